@@ -0,0 +1,123 @@
+import numpy as np
+from scipy.special import digamma, polygamma
+from streaming import CHUNK_SIZE, array_chunks
+
+# Newton iterations stop once the relative change of the shape is below this
+TOLERANCE = 1e-12
+MAX_ITERATIONS = 100
+
+
+class SufficientStatistics:
+    # Count, sum, sum of logs, sum of squared logs and largest log of a
+    # positive sample, accumulated chunk by chunk. They determine the gamma MLE
+    # and the starting point of the Weibull iteration.
+    def __init__(self):
+        self.n = 0
+        self.sum = 0.0
+        self.sum_log = 0.0
+        self.sum_log2 = 0.0
+        self.max_log = -np.inf
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        statistics = cls()
+        for chunk in chunks:
+            statistics.update(chunk)
+        return statistics
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        logs = np.log(chunk)
+        self.n += len(chunk)
+        self.sum += chunk.sum()
+        self.sum_log += logs.sum()
+        self.sum_log2 += np.dot(logs, logs)
+        if len(chunk):
+            self.max_log = max(self.max_log, logs.max())
+        return self
+
+    def merge(self, other):
+        self.n += other.n
+        self.sum += other.sum
+        self.sum_log += other.sum_log
+        self.sum_log2 += other.sum_log2
+        self.max_log = max(self.max_log, other.max_log)
+        return self
+
+    def mean(self):
+        return self.sum / self.n
+
+    def mean_log(self):
+        return self.sum_log / self.n
+
+
+def _chunks(data, chunk_size):
+    # data is an array (possibly memory-mapped) or a callable returning chunks
+    return data() if callable(data) else array_chunks(data, chunk_size)
+
+
+def fit_gamma(data=None, statistics=None, chunk_size=CHUNK_SIZE):
+    # Gamma MLE with the location fixed at 0, returned like gamma.fit(data,
+    # floc=0) as (shape, loc, scale). The shape only depends on
+    # log(mean) - mean(log), so it is solved with Minka's Newton update on
+    # 1/shape without touching the data again.
+    if statistics is None:
+        statistics = SufficientStatistics.from_chunks(_chunks(data, chunk_size))
+    mean, mean_log = statistics.mean(), statistics.mean_log()
+    s = np.log(mean) - mean_log
+    shape = (3 - s + np.sqrt((s - 3) ** 2 + 24 * s)) / (12 * s)
+    for _ in range(MAX_ITERATIONS):
+        gradient = mean_log - np.log(mean) + np.log(shape) - digamma(shape)
+        curvature = shape ** 2 * (1 / shape - polygamma(1, shape))
+        updated = 1 / (1 / shape + gradient / curvature)
+        converged = abs(updated - shape) <= TOLERANCE * shape
+        shape = updated
+        if converged:
+            break
+    return float(shape), 0, float(mean / shape)
+
+
+def _weibull_sums(data, shape, max_log, chunk_size):
+    # Sums of w, w*log(x) and w*log(x)^2 with w = (x / max(x))^shape, the
+    # rescaling keeping x^shape from overflowing
+    sum_w = sum_w_log = sum_w_log2 = 0.0
+    for chunk in _chunks(data, chunk_size):
+        logs = np.log(np.asarray(chunk, dtype=float))
+        weights = np.exp(shape * (logs - max_log))
+        weighted_logs = weights * logs
+        sum_w += weights.sum()
+        sum_w_log += weighted_logs.sum()
+        sum_w_log2 += np.dot(weighted_logs, logs)
+    return sum_w, sum_w_log, sum_w_log2
+
+
+def fit_weibull(data, statistics=None, chunk_size=CHUNK_SIZE):
+    # Weibull MLE with the location fixed at 0, returned like
+    # weibull_min.fit(data, floc=0) as (c, loc, scale). Newton's method on the
+    # profile likelihood equation
+    #     sum(x^c log x) / sum(x^c) - 1/c - mean(log x) = 0
+    # needs one vectorized pass over the data per iteration, and the scale one
+    # more. Starting from the log-moment estimate c = pi / (sqrt(6) * std(log x))
+    # it usually converges in three or four iterations, so the fit reads the
+    # data four or five times on top of the statistics' pass.
+    if statistics is None:
+        statistics = SufficientStatistics.from_chunks(_chunks(data, chunk_size))
+    mean_log = statistics.mean_log()
+    log_variance = statistics.sum_log2 / statistics.n - mean_log ** 2
+    shape = np.pi / np.sqrt(6 * log_variance)
+    max_log = statistics.max_log
+    for _ in range(MAX_ITERATIONS):
+        sum_w, sum_w_log, sum_w_log2 = _weibull_sums(data, shape, max_log, chunk_size)
+        ratio = sum_w_log / sum_w
+        value = ratio - 1 / shape - mean_log
+        derivative = sum_w_log2 / sum_w - ratio ** 2 + 1 / shape ** 2
+        updated = shape - value / derivative
+        if updated <= 0:
+            updated = shape / 2
+        converged = abs(updated - shape) <= TOLERANCE * shape
+        shape = updated
+        if converged:
+            break
+    sum_w, _, _ = _weibull_sums(data, shape, max_log, chunk_size)
+    scale = np.exp(max_log) * (sum_w / statistics.n) ** (1 / shape)
+    return float(shape), 0, float(scale)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+from streaming import CHUNK_SIZE, read_chunks
+
+# Converted samples live here, named by the SHA-256 of the text they came from
+CACHE_DIR = '.sample_cache'
+INDEX_FILE = 'index.json'
+
+# Column file: magic, version, dtype code ('d' float64 or 'f' float32), padding
+# and the number of observations, followed by the raw little-endian values
+MAGIC = b'SMPL'
+VERSION = 1
+HEADER = struct.Struct('<4sBc2xQ')
+DTYPES = {b'd': '<f8', b'f': '<f4'}
+
+
+def convert(text_path, binary_path, dtype='<f8', chunk_size=CHUNK_SIZE):
+    # Parse a text sample once, in chunks, into a column file
+    code = {np.dtype(value): key for key, value in DTYPES.items()}[np.dtype(dtype)]
+    count = 0
+    with open(binary_path, 'wb') as binary:
+        binary.write(HEADER.pack(MAGIC, VERSION, code, 0))
+        for chunk in read_chunks(text_path, chunk_size):
+            chunk.astype(dtype).tofile(binary)
+            count += len(chunk)
+        # The count is only known at the end; the header has a fixed size
+        binary.seek(0)
+        binary.write(HEADER.pack(MAGIC, VERSION, code, count))
+    return binary_path
+
+
+def open_binary(binary_path):
+    # Memory-map a column file; nothing is read until the values are used
+    with open(binary_path, 'rb') as binary:
+        magic, version, code, count = HEADER.unpack(binary.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or code not in DTYPES:
+        raise ValueError(f'{binary_path} is not a sample column file')
+    if count == 0:
+        return np.empty(0, dtype=DTYPES[code])
+    return np.memmap(binary_path, dtype=DTYPES[code], mode='r', offset=HEADER.size, shape=(count,))
+
+
+def content_hash(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r') as index:
+            return json.load(index)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(cache_dir, index):
+    path = os.path.join(cache_dir, INDEX_FILE)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(index, file)
+    os.replace(path + '.tmp', path)
+
+
+def load_sample(text_path, cache_dir=CACHE_DIR, dtype='<f8'):
+    # The observations of a text sample as a read-only memory map. The text is
+    # parsed only when no column file exists for its content; the index
+    # remembers each file's size and mtime, so an unchanged file is not even
+    # re-hashed.
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(text_path)
+    key = f'{os.path.abspath(text_path)}:{np.dtype(dtype).str}'
+    index = _read_index(cache_dir)
+    entry = index.get(key)
+    if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        digest = entry['sha256']
+    else:
+        digest = content_hash(text_path)
+    binary_path = os.path.join(cache_dir, f'{digest}.{np.dtype(dtype).str[1:]}.smpl')
+    if not os.path.exists(binary_path):
+        # Write under a temporary name so an interrupted run leaves no partial file
+        convert(text_path, binary_path + '.tmp', dtype)
+        os.replace(binary_path + '.tmp', binary_path)
+    if entry is None or entry['sha256'] != digest or entry['mtime_ns'] != stat.st_mtime_ns:
+        index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        _write_index(cache_dir, index)
+    return open_binary(binary_path)
@@ -0,0 +1,199 @@
+import itertools
+import numpy as np
+
+# Observations read per chunk; memory stays bounded by this, not the file size
+CHUNK_SIZE = 1 << 20
+# Size of the largest compactor in the quantile sketch. Samples up to this size
+# are kept whole, so their quantiles are exact.
+SKETCH_CAPACITY = 4096
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE, binary=False, dtype='<f8'):
+    # Yield the observations of a sample file as arrays of at most chunk_size.
+    # Text files hold whitespace-separated values, one per line; binary files
+    # are raw `dtype` values.
+    if binary:
+        with open(path, 'rb') as file:
+            while True:
+                chunk = np.fromfile(file, dtype=dtype, count=chunk_size)
+                if not len(chunk):
+                    break
+                yield chunk.astype(float, copy=False)
+    else:
+        with open(path, 'r') as file:
+            while True:
+                lines = list(itertools.islice(file, chunk_size))
+                if not lines:
+                    break
+                yield np.loadtxt(lines, ndmin=1)
+
+
+def array_chunks(data, chunk_size=CHUNK_SIZE):
+    # Chunks of an in-memory or memory-mapped array, as float64 arrays
+    for start in range(0, len(data), chunk_size):
+        yield np.asarray(data[start:start + chunk_size], dtype=float)
+
+
+class StreamingMoments:
+    # Count, mean and second/third central moment sums, updated chunk by chunk
+    # and mergeable with Pébay's pairwise formulas
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        if not len(chunk):
+            return self
+        other = StreamingMoments()
+        other.n = len(chunk)
+        other.mean = chunk.mean()
+        deviations = chunk - other.mean
+        other.m2 = np.dot(deviations, deviations)
+        other.m3 = np.dot(deviations * deviations, deviations)
+        other.min = chunk.min()
+        other.max = chunk.max()
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m3 += (other.m3
+                    + delta ** 3 * self.n * other.n * (self.n - other.n) / n ** 2
+                    + 3 * delta * (self.n * other.m2 - other.n * self.m2) / n)
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def std(self):
+        # Population standard deviation, as np.std
+        return np.sqrt(self.m2 / self.n)
+
+    def skewness(self):
+        # Biased sample skewness, as scipy.stats.skew
+        return np.sqrt(self.n) * self.m3 / self.m2 ** 1.5
+
+
+class QuantileSketch:
+    # KLL quantile sketch. Level i holds items that each stand for 2^i
+    # observations; a full level is sorted and every other item is promoted.
+    # Sketches of separate chunks or files merge by concatenating levels.
+    def __init__(self, capacity=SKETCH_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.rng = np.random.default_rng(seed)
+
+    def _level_capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(self.capacity * (2 / 3) ** depth))
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        self.n += len(chunk)
+        self.levels[0] = np.concatenate([self.levels[0], chunk])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._level_capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd count leaves one item behind at this level
+                keep = items[:len(items) % 2]
+                promoted = items[len(keep) + self.rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        if len(self.levels) == 1:
+            # Nothing has been compacted, so the sketch still holds the sample
+            return np.quantile(self.levels[0], q)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1])
+        return items[order][min(index, len(items) - 1)]
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+class StreamingHistogram:
+    # Counts over fixed bin edges, plus the observations below and above them
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        self.counts += np.histogram(chunk, bins=self.edges)[0]
+        self.underflow += np.count_nonzero(chunk < self.edges[0])
+        self.overflow += np.count_nonzero(chunk > self.edges[-1])
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def density(self):
+        # Normalized like plt.hist(..., density=True)
+        return self.counts / (self.counts.sum() * np.diff(self.edges))
+
+
+def summarize_chunks(chunks, edges=None):
+    # One pass over the chunks: moments, a quantile sketch and, when bin edges
+    # are given, a histogram
+    moments = StreamingMoments()
+    sketch = QuantileSketch()
+    histogram = StreamingHistogram(edges) if edges is not None else None
+    for chunk in chunks:
+        moments.update(chunk)
+        sketch.update(chunk)
+        if histogram is not None:
+            histogram.update(chunk)
+    return moments, sketch, histogram
+
+
+def summarize(path, chunk_size=CHUNK_SIZE, binary=False, edges=None):
+    return summarize_chunks(read_chunks(path, chunk_size, binary), edges)
+
+
+def histogram_chunks(chunks, edges):
+    result = StreamingHistogram(edges)
+    for chunk in chunks:
+        result.update(chunk)
+    return result
+
+
+def histogram(path, edges, chunk_size=CHUNK_SIZE, binary=False):
+    return histogram_chunks(read_chunks(path, chunk_size, binary), edges)
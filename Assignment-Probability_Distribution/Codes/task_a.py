@@ -1,16 +1,19 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import scipy.stats as stats
+from sample_cache import load_sample
+from streaming import array_chunks, histogram_chunks, summarize_chunks
 
-# Read data from file
-with open('sample.txt', 'r') as file:
-    data = np.loadtxt(file)
+# Read data from file (parsed once, then memory-mapped from the cache) in
+# chunks, keeping only running statistics
+data = load_sample('sample.txt')
+moments, sketch, _ = summarize_chunks(array_chunks(data))
 
 #calculate mean, median and mode
-mean = np.mean(data)
-median = np.median(data)
-std = np.std(data)
-skewness = stats.skew(data)
+mean = moments.mean
+median = sketch.median()
+std = moments.std()
+skewness = moments.skewness()
 
 print('Mean: ', mean)
 print('Median: ', median)
@@ -18,8 +21,9 @@ print('Standard Deviation: ', std)
 print('Skewness: ', skewness)
 
 # -------------------- 2d Plot -------------------- #
-# Plot the histogram of the data
-plt.hist(data, bins=100, density=True, alpha=0.6, color='g')
+# Plot the histogram of the data (a second pass, now that the range is known)
+data_histogram = histogram_chunks(array_chunks(data), np.linspace(moments.min, moments.max, 101))
+plt.stairs(data_histogram.density(), data_histogram.edges, fill=True, alpha=0.6, color='g')
 
 # Overlay a normal distribution for comparison
 xmin, xmax = plt.xlim()
@@ -1,17 +1,20 @@
-import numpy as np
-from scipy.stats import gamma, weibull_min
+from fitting import SufficientStatistics, fit_gamma, fit_weibull
+from sample_cache import load_sample
+from streaming import array_chunks
 
-# Load your data
-with open('sample.txt', 'r') as file:
-    data = np.loadtxt(file)
+# Load your data (parsed once, then memory-mapped from the cache)
+data = load_sample('sample.txt')
+
+# Sufficient statistics (n, sum, sum of logs, sum of squared logs), in one pass
+statistics = SufficientStatistics.from_chunks(array_chunks(data))
 
 # Gamma Distribution: MLE
-# The gamma distribution parameters can be estimated with the `fit` method, which uses MLE under the hood
-alpha_hat, loc_hat, beta_hat = gamma.fit(data, floc=0)  # Keeping location parameter fixed at 0
+# The gamma shape follows from the mean and mean log alone (Newton's method), keeping location fixed at 0
+alpha_hat, loc_hat, beta_hat = fit_gamma(statistics=statistics)
 
 # Weibull Distribution: MLE
-# Similar to the gamma distribution, we can estimate the parameters of the Weibull distribution using the `fit` method
-params = weibull_min.fit(data, floc=0)  # Keeping location parameter fixed at 0
+# Newton's method on the Weibull profile likelihood, one pass over the data per step, location fixed at 0
+params = fit_weibull(data, statistics)
 c_hat, loc_hat, scale_hat = params
 
 print("Gamma Distribution Parameters (alpha, loc, beta):", alpha_hat, loc_hat, beta_hat)
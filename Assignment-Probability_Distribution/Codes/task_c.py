@@ -1,27 +1,35 @@
 import numpy as np
 from scipy.stats import chi2, gamma
+from fitting import SufficientStatistics, fit_gamma
+from sample_cache import load_sample
+from streaming import StreamingMoments, array_chunks, histogram_chunks
 
-# Load the dataset
-with open('sample.txt', 'r') as file:
-    data = np.loadtxt(file)
+# Load the dataset (parsed once, then memory-mapped from the cache)
+data = load_sample('sample.txt')
+
+# One pass over the data in chunks for the range and the gamma fit's
+# sufficient statistics
+moments = StreamingMoments()
+statistics = SufficientStatistics()
+for chunk in array_chunks(data):
+    moments.update(chunk)
+    statistics.update(chunk)
 
 # Estimate the parameters of the gamma distribution (shape and scale) for the given data
-alpha_hat, loc_hat, scale_hat = gamma.fit(data, floc=0)
+alpha_hat, loc_hat, scale_hat = fit_gamma(statistics=statistics)
 
 # Define the number of bins for the chi-square test
 num_bins = 50
 
-# Create the bins for the histogram
-bin_edges = np.linspace(min(data), max(data), num_bins+1)
-observed_freq, _ = np.histogram(data, bins=bin_edges)
+# Create the bins for the histogram and count them in a second pass
+bin_edges = np.linspace(moments.min, moments.max, num_bins+1)
+observed_freq = histogram_chunks(array_chunks(data), bin_edges).counts
 
-# Generate the expected frequencies for each bin
-expected_freq = np.zeros(num_bins)
-for i in range(num_bins):
-    expected_freq[i] = gamma.cdf(bin_edges[i+1], alpha_hat, scale=scale_hat) - gamma.cdf(bin_edges[i], alpha_hat, scale=scale_hat)
+# Generate the expected frequencies for each bin, evaluating the CDF at all edges at once
+expected_freq = np.diff(gamma.cdf(bin_edges, alpha_hat, scale=scale_hat))
 
 # The expected frequencies need to be scaled to the total number of observations
-expected_freq *= len(data)
+expected_freq *= moments.n
 
 # Perform the Chi-Square Goodness of Fit Test
 chi_square_statistic = ((observed_freq - expected_freq) ** 2 / expected_freq).sum()
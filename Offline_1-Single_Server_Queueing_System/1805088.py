@@ -1,219 +1,912 @@
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import itertools
 import math
 import numpy as np
-from queue import Queue
 import os
+from scipy import stats
+import struct
+import sys
+
+# checkpointing.py, event_list.py, pmmlcg.py, profiling.py, variates.py and
+# result_cache.py at the top of the repository are shared by the simulators
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from checkpointing import Checkpointer, remove_checkpoint, write_atomically
+import event_list
+from event_list import CalendarQueue, FutureEventList
+import pmmlcg
+from pmmlcg import PMMLCG, SubstreamFactory
+from profiling import Profiler
+import result_cache
+import variates
 
 INPUT_FILE_DIR = "./input_file/in.txt"
 OUTPUT_FILE_DIR = "./output_files/"
 RESULT_FILE = "results.txt"
 EVENT_ORDERS_FILE = "event_orders.txt"
+EVENT_ORDERS_BINARY_FILE = "event_orders.bin"
 
-class PMMLCG:
-    MODLUS = 2147483647
-    MULT1 = 24112
-    MULT2 = 26143
-
-    def __init__(self):
-        self.zrng = [
-            1, 1973272912, 281629770, 20006270, 1280689831, 2096730329, 1933576050,
-            913566091, 246780520, 1363774876, 604901985, 1511192140, 1259851944,
-            824064364, 150493284, 242708531, 75253171, 1964472944, 1202299975,
-            233217322, 1911216000, 726370533, 403498145, 993232223, 1103205531,
-            762430696, 1922803170, 1385516923, 76271663, 413682397, 726466604,
-            336157058, 1432650381, 1120463904, 595778810, 877722890, 1046574445,
-            68911991, 2088367019, 748545416, 622401386, 2122378830, 640690903,
-            1774806513, 2132545692, 2079249579, 78130110, 852776735, 1187867272,
-            1351423507, 1645973084, 1997049139, 922510944, 2045512870, 898585771,
-            243649545, 1004818771, 773686062, 403188473, 372279877, 1901633463,
-            498067494, 2087759558, 493157915, 597104727, 1530940798, 1814496276,
-            536444882, 1663153658, 855503735, 67784357, 1432404475, 619691088,
-            119025595, 880802310, 176192644, 1116780070, 277854671, 1366580350,
-            1142483975, 2026948561, 1053920743, 786262391, 1792203830, 1494667770,
-            1923011392, 1433700034, 1244184613, 1147297105, 539712780, 1545929719,
-            190641742, 1645390429, 264907697, 620389253, 1502074852, 927711160,
-            364849192, 2049576050, 638580085, 547070247
-        ]
+# Event types, also used as trace record types
+ARRIVAL = 1
+DEPARTURE = 2
+CUSTOMER_DELAYED = 3
 
-    def generate(self, stream):
-        zi = self.zrng[stream]
-        lowprd = (zi & 65535) * self.MULT1
-        hi31 = (zi >> 16) * self.MULT1 + (lowprd >> 16)
-        zi = ((lowprd & 65535) - self.MODLUS) + ((hi31 & 32767) << 16) + (hi31 >> 15)
-        if zi < 0:
-            zi += self.MODLUS
-        lowprd = (zi & 65535) * self.MULT2
-        hi31 = (zi >> 16) * self.MULT2 + (lowprd >> 16)
-        zi = ((lowprd & 65535) - self.MODLUS) + ((hi31 & 32767) << 16) + (hi31 >> 15)
-        if zi < 0:
-            zi += self.MODLUS
-        self.zrng[stream] = zi
-        return (zi >> 7 | 1) / 16777216.0
-
-    def set_seed(self, zset, stream):
-        self.zrng[stream] = zset
-
-    def get_seed(self, stream):
-        return self.zrng[stream]
-    
-    
-pmmlcg = PMMLCG()
-def exponen(exponential_probability_distribution_mean):
-    return -1 * exponential_probability_distribution_mean * math.log(round(pmmlcg.generate(1), 6))
-
-def initialize_simulation(mean_inter_arrival_time):
-    global simulation_time, server_status, number_in_queue, \
-        time_of_last_event, num_customers_delayed, total_delays, \
-        area_num_in_queue, area_server_status, \
-        total_customer_arrived, time_next_event_arrival, \
-        time_next_event_departure, num_of_event, num_of_arrival, \
-        num_of_departure, times_of_arrival
-    
-    # System States
-    server_status = False
-    number_in_queue = 0
-    time_of_last_event = 0
-    total_customer_arrived = 1
-    num_of_event = 0
-    num_of_arrival = 0
-    num_of_departure = 0
-    
-    # Simulation States
-    simulation_time = 0
-    
-    # Event States
-    time_next_event_arrival = exponen(mean_inter_arrival_time)
-    time_next_event_departure = math.inf
-    times_of_arrival = Queue()
-    
-    # Statistical Values
-    num_customers_delayed = 0
-    total_delays = 0
-    area_num_in_queue = 0
-    area_server_status = 0
-    
-def inc_num_customer_delayed():
-    global num_customers_delayed
-    
-    num_customers_delayed += 1
-    with open(OUTPUT_FILE_DIR+EVENT_ORDERS_FILE, "a+") as event:
-        event.write(
-            f'\n---------No. of customers delayed: {num_customers_delayed}--------\n\n'
-        )
+# Initial number of slots in ArrivalTimeBuffer; it doubles whenever it fills up
+ARRIVAL_BUFFER_CAPACITY = 1024
+
+# Statistics aggregated across replications, as named on QueueResult
+REPLICATION_STATISTICS = ("avg_delay_in_queue", "avg_number_in_queue", "server_utilization")
+# Upper bound on replications when stopping on a target half-width
+MAX_REPLICATIONS = 100
+# Fast FIFO mode: stream of the service times (inter-arrival times use stream
+# 1), and customers handled per vectorized chunk
+FAST_FIFO_SERVICE_STREAM = 2
+FAST_FIFO_CHUNK = 2 ** 16
+
+# Steady-state mode: customers per MSER-5 observation and the number of batch
+# means the confidence intervals are computed from
+MSER_BATCH_SIZE = 5
+STEADY_STATE_BATCHES = 20
+
+# Methods timed by --profile, and the handler of each event type
+PROFILED_METHODS = ("timing", "update_time_avg_stats", "arrive", "depart", "inc_num_customer_delayed", "exponen")
+EVENT_HANDLERS = {"arrival": "arrive", "departure": "depart"}
+
+# Trace records buffered before a sink writes them out
+TRACE_FLUSH_SIZE = 4096
+# Binary trace record: event number, event type, customer id, simulation time
+TRACE_RECORD = struct.Struct("<QBQd")
+
+# Trace formats; a checkpoint stores the index of the one in use
+TRACE_MODES = ("off", "text", "binary")
+
+# Checkpoints: a header (magic, version, event list kind, trace mode), the
+# CHECKPOINT_STATE scalars, one CHECKPOINT_EVENT per pending event, the arrival
+# times of the queued customers and the seed of every PMMLCG stream
+CHECKPOINT_FILE = "checkpoint.bin"
+CHECKPOINT_MAGIC = b"SSQC"
+CHECKPOINT_VERSION = 2
+CHECKPOINT_HEADER = struct.Struct("<4sHBB")
+CHECKPOINT_STATE = struct.Struct("<ddQQQQ?QdQQQQdQdddQqQQQQ")
+CHECKPOINT_EVENT = struct.Struct("<dqQB")
+
+# Number of uniforms PMMLCG generates per block for each stream
+RNG_BUFFER_SIZE = 4096
+
+
+def format_trace_record(event_type, event_no, customer):
+    # Text form of one trace record, exactly as event_orders.txt has always had it
+    if event_type == ARRIVAL:
+        return f'{event_no}. Next event: Customer {customer} Arrival\n'
+    if event_type == DEPARTURE:
+        return f'{event_no}. Next event: Customer {customer} Departure\n'
+    return f'\n---------No. of customers delayed: {customer}--------\n\n'
+
+
+class TextTraceSink:
+    # Appends the human-readable event log, writing once every flush_size records
+    mode = "text"
+
+    def __init__(self, path, flush_size=TRACE_FLUSH_SIZE):
+        self.file = open(path, "a+")
+        self.flush_size = flush_size
+        self.pending = []
+
+    def record(self, event_type, event_no, customer, time):
+        self.pending.append(format_trace_record(event_type, event_no, customer))
+        if len(self.pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(''.join(self.pending))
+        self.pending.clear()
+
+    def position(self):
+        # Size of the log with every pending record written out
+        self.flush()
+        self.file.flush()
+        return self.file.tell()
+
+    def truncate(self, size):
+        # Drop what was logged after a checkpoint taken at this size
+        self.file.truncate(size)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class BinaryTraceSink:
+    # Appends fixed-size TRACE_RECORD entries; decode_trace() turns them back into text
+    mode = "binary"
+
+    def __init__(self, path, flush_size=TRACE_FLUSH_SIZE):
+        self.file = open(path, "ab")
+        self.flush_size = flush_size
+        self.pending = bytearray()
+        self.num_pending = 0
+
+    def record(self, event_type, event_no, customer, time):
+        self.pending += TRACE_RECORD.pack(event_no, event_type, customer, time)
+        self.num_pending += 1
+        if self.num_pending >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.pending)
+        self.pending.clear()
+        self.num_pending = 0
+
+    def position(self):
+        # Size of the log with every pending record written out
+        self.flush()
+        self.file.flush()
+        return self.file.tell()
+
+    def truncate(self, size):
+        # Drop what was logged after a checkpoint taken at this size
+        self.file.truncate(size)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def open_trace_sink(mode, output_dir=OUTPUT_FILE_DIR, flush_size=TRACE_FLUSH_SIZE):
+    # None means tracing is off; the simulator then skips trace calls entirely
+    if mode == "off":
+        return None
+    if mode == "text":
+        return TextTraceSink(output_dir + EVENT_ORDERS_FILE, flush_size)
+    if mode == "binary":
+        return BinaryTraceSink(output_dir + EVENT_ORDERS_BINARY_FILE, flush_size)
+    raise ValueError(f"Unknown trace mode: {mode}")
+
+
+def decode_trace(binary_path, text_path):
+    # Rebuild event_orders.txt from a binary trace
+    with open(binary_path, "rb") as binary, open(text_path, "w") as text:
+        while True:
+            chunk = binary.read(TRACE_RECORD.size * TRACE_FLUSH_SIZE)
+            if not chunk:
+                break
+            text.write(''.join(
+                format_trace_record(event_type, event_no, customer)
+                for event_no, event_type, customer, _ in TRACE_RECORD.iter_unpack(chunk)
+            ))
+
+
+class ArrivalTimeBuffer:
+    # FIFO of the arrival times of queued customers: a growable ring buffer over
+    # array('d'). The simulation is single-threaded, so unlike queue.Queue it
+    # takes no locks, and times are stored as raw doubles rather than objects.
+    __slots__ = ("times", "head", "size", "high_water_mark")
+
+    def __init__(self, capacity=ARRIVAL_BUFFER_CAPACITY):
+        self.times = array('d', bytes(8 * capacity))
+        self.head = 0
+        self.size = 0
+        # Longest the queue has been, i.e. the maximum number in queue
+        self.high_water_mark = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, time):
+        capacity = len(self.times)
+        if self.size == capacity:
+            self._grow()
+            capacity = len(self.times)
+        tail = self.head + self.size
+        if tail >= capacity:
+            tail -= capacity
+        self.times[tail] = time
+        self.size += 1
+        if self.size > self.high_water_mark:
+            self.high_water_mark = self.size
+
+    def pop(self):
+        if self.size == 0:
+            raise IndexError("pop from an empty ArrivalTimeBuffer")
+        time = self.times[self.head]
+        self.head += 1
+        if self.head == len(self.times):
+            self.head = 0
+        self.size -= 1
+        return time
+
+    def snapshot(self):
+        # The queued arrival times, oldest first
+        end = self.head + self.size
+        if end <= len(self.times):
+            return self.times[self.head:end]
+        return self.times[self.head:] + self.times[:end - len(self.times)]
+
+    @classmethod
+    def from_times(cls, times, high_water_mark=0):
+        buffer = cls(max(ARRIVAL_BUFFER_CAPACITY, len(times)))
+        buffer.times[:len(times)] = array('d', times)
+        buffer.size = len(times)
+        buffer.high_water_mark = max(high_water_mark, len(times))
+        return buffer
+
+    def _grow(self):
+        # Unroll the ring into an array twice the size, oldest time first
+        times = self.times[self.head:] + self.times[:self.head]
+        times.extend(array('d', bytes(8 * len(times))))
+        self.times = times
+        self.head = 0
+
+
+class QueueResult:
+    # The four statistics generate_report() writes for one run
+    __slots__ = ("avg_delay_in_queue", "avg_number_in_queue", "server_utilization", "simulation_time")
+
+    def __init__(self, avg_delay_in_queue, avg_number_in_queue, server_utilization, simulation_time):
+        self.avg_delay_in_queue = avg_delay_in_queue
+        self.avg_number_in_queue = avg_number_in_queue
+        self.server_utilization = server_utilization
+        self.simulation_time = simulation_time
+
+
+def read_config(input_file_path):
+    # The `in.txt` fields: mean inter-arrival time, mean service time and
+    # number of customers
+    with open(input_file_path, "r") as inputs:
+        inputs = inputs.read().split(' ')
+    return float(inputs[0]), float(inputs[1]), int(inputs[2])
+
+
+class SingleServerQueue:
+    # One single-server queueing simulation. All state lives on the instance, so
+    # several queues can run side by side in one process.
+    __slots__ = (
+        "mean_inter_arrival_time", "mean_service_time", "num_of_delays_required",
+        "rng", "stream", "service_stream", "trace_sink", "event_list",
+        # System States
+        "server_status", "number_in_queue", "time_of_last_event", "total_customer_arrived",
+        "num_of_event", "num_of_arrival", "num_of_departure",
+        # Simulation States
+        "simulation_time",
+        # Event States
+        "times_of_arrival",
+        # Statistical Values
+        "num_customers_delayed", "total_delays", "area_num_in_queue", "area_server_status",
+    )
+
+    def __init__(self, mean_inter_arrival_time, mean_service_time, num_of_delays_required,
+                 rng=None, stream=1, trace_sink=None, event_list_factory=FutureEventList, service_stream=None):
+        self.mean_inter_arrival_time = mean_inter_arrival_time
+        self.mean_service_time = mean_service_time
+        self.num_of_delays_required = num_of_delays_required
+        self.rng = PMMLCG(buffer_size=RNG_BUFFER_SIZE) if rng is None else rng
+        self.stream = stream
+        # Service times come from `stream` too unless a separate stream is given
+        self.service_stream = stream if service_stream is None else service_stream
+        self.trace_sink = trace_sink
+        # A departure and an arrival at the same time are handled departure first
+        self.event_list = event_list_factory(priority={DEPARTURE: 0, ARRIVAL: 1})
+
+    @classmethod
+    def from_input_file(cls, input_file_path, **kwargs):
+        return cls(*read_config(input_file_path), **kwargs)
+
+    def exponen(self, exponential_probability_distribution_mean, stream):
+        # Uniforms are rounded to 6 decimals as the model always has; one below
+        # 5e-7 (about one draw in two million) is taken as 1e-6 instead of
+        # failing in log(0)
+        return -1 * exponential_probability_distribution_mean * math.log(round(self.rng.generate(stream), 6) or 1e-6)
+
+    def initialize_simulation(self):
+        # System States
+        self.server_status = False
+        self.number_in_queue = 0
+        self.time_of_last_event = 0
+        self.total_customer_arrived = 1
+        self.num_of_event = 0
+        self.num_of_arrival = 0
+        self.num_of_departure = 0
         
-def update_time_avg_stats():
-    global area_num_in_queue, area_server_status,\
-        simulation_time, time_of_last_event
+        # Simulation States
+        self.simulation_time = 0
         
-    area_num_in_queue += number_in_queue * (simulation_time - time_of_last_event)
-    area_server_status += server_status * (simulation_time - time_of_last_event)
-    time_of_last_event = simulation_time
-    
-def timing():
-    global simulation_time
-    
-    if (time_next_event_arrival < time_next_event_departure):
-       simulation_time = time_next_event_arrival
-       return 1 # 1 = arrival event
-    else:
-        simulation_time = time_next_event_departure
-        return 2 # 2 = departure event
-    
-def arrive(mean_inter_arrival_time, mean_service_time, num_of_delays_required):
-    global num_of_arrival, time_next_event_arrival, \
-        total_customer_arrived, number_in_queue, \
-        area_num_in_queue, area_server_status, \
-        num_customers_delayed, server_status, \
-        time_next_event_departure, time_of_last_event, \
-        times_of_arrival
+        # Event States. The departure event is only scheduled while the server is busy.
+        self.event_list.clear()
+        self.event_list.schedule(self.exponen(self.mean_inter_arrival_time, self.stream), ARRIVAL)
+        self.times_of_arrival = ArrivalTimeBuffer()
         
-    num_of_arrival += 1
-    with open(OUTPUT_FILE_DIR+EVENT_ORDERS_FILE, "a+") as event:
-        event.write(
-            f'{num_of_event}. Next event: Customer {num_of_arrival} Arrival\n'
-        )
-     
-    time_next_event_arrival = simulation_time + exponen(mean_inter_arrival_time)
-    total_customer_arrived += 1
-
-    if server_status:
-        number_in_queue += 1
-        assert number_in_queue <= num_of_delays_required, 'Queue is Full!!' 
-        times_of_arrival.put(simulation_time)
-    else:
-        inc_num_customer_delayed()
+        # Statistical Values
+        self.num_customers_delayed = 0
+        self.total_delays = 0
+        self.area_num_in_queue = 0
+        self.area_server_status = 0
         
-        server_status = True
-        time_next_event_departure = simulation_time + exponen(mean_service_time)
+    def inc_num_customer_delayed(self):
+        self.num_customers_delayed += 1
+        if self.trace_sink is not None:
+            self.trace_sink.record(CUSTOMER_DELAYED, self.num_of_event, self.num_customers_delayed, self.simulation_time)
+            
+    def update_time_avg_stats(self):
+        self.area_num_in_queue += self.number_in_queue * (self.simulation_time - self.time_of_last_event)
+        self.area_server_status += self.server_status * (self.simulation_time - self.time_of_last_event)
+        self.time_of_last_event = self.simulation_time
         
-def depart(mean_service_time):
-    global num_of_departure, time_next_event_arrival, \
-        total_customer_arrived, number_in_queue, \
-        area_num_in_queue, area_server_status, \
-        num_customers_delayed, server_status, \
-        time_next_event_departure, time_of_last_event, \
-        times_of_arrival, total_delays
+    def timing(self):
+        self.simulation_time, next_event_type, _ = self.event_list.pop()
+        return next_event_type
         
-    num_of_departure += 1
-    with open(OUTPUT_FILE_DIR+EVENT_ORDERS_FILE, "a+") as event:
-        event.write(
-            f'{num_of_event}. Next event: Customer {num_of_departure} Departure\n'
+    def arrive(self):
+        self.num_of_arrival += 1
+        if self.trace_sink is not None:
+            self.trace_sink.record(ARRIVAL, self.num_of_event, self.num_of_arrival, self.simulation_time)
+         
+        self.event_list.schedule(self.simulation_time + self.exponen(self.mean_inter_arrival_time, self.stream), ARRIVAL)
+        self.total_customer_arrived += 1
+
+        if self.server_status:
+            self.number_in_queue += 1
+            assert self.number_in_queue <= self.num_of_delays_required, 'Queue is Full!!'
+            self.times_of_arrival.push(self.simulation_time)
+        else:
+            self.inc_num_customer_delayed()
+            
+            self.server_status = True
+            self.event_list.schedule(self.simulation_time + self.exponen(self.mean_service_time, self.service_stream), DEPARTURE)
+            
+    def depart(self):
+        self.num_of_departure += 1
+        if self.trace_sink is not None:
+            self.trace_sink.record(DEPARTURE, self.num_of_event, self.num_of_departure, self.simulation_time)
+            
+        if self.number_in_queue == 0:
+            self.server_status = False
+        else:
+            self.number_in_queue -= 1
+            self.total_delays += (self.simulation_time - self.times_of_arrival.pop())
+            
+            self.inc_num_customer_delayed()
+            self.event_list.schedule(self.simulation_time + self.exponen(self.mean_service_time, self.service_stream), DEPARTURE)
+
+    def num_draws(self):
+        # Uniforms drawn since initialize_simulation(): an inter-arrival time
+        # for the first arrival and after every arrival, and a service time
+        # per customer delayed
+        return self.num_of_arrival + 1 + self.num_customers_delayed
+
+    def result(self):
+        return QueueResult(
+            self.total_delays / self.num_customers_delayed,
+            self.area_num_in_queue / self.simulation_time,
+            self.area_server_status / self.simulation_time,
+            self.simulation_time,
         )
+
+    def run(self, num_delays=None, checkpointer=None):
+        # Simulate until `num_delays` customers (default: the configured number)
+        # have been delayed and return the resulting statistics
+        if num_delays is None:
+            num_delays = self.num_of_delays_required
+        self.initialize_simulation()
+        return self.resume(num_delays, checkpointer)
+
+    def resume(self, num_delays, checkpointer=None):
+        # Continue the event loop from the current state, e.g. one restored by
+        # from_checkpoint(), saving a checkpoint whenever `checkpointer` says so
+        next_check = math.inf
+        if checkpointer is not None:
+            checkpointer.start(self.num_of_event)
+            next_check = self.num_of_event + checkpointer.check_interval
+        
+        while (self.num_customers_delayed < num_delays):
+            if self.num_of_event >= next_check:
+                if checkpointer.due(self.num_of_event):
+                    self.save_checkpoint(checkpointer.path, num_delays)
+                    checkpointer.saved(self.num_of_event)
+                next_check = self.num_of_event + checkpointer.check_interval
+            
+            self.num_of_event += 1
+            
+            next_event_type = self.timing()
+            self.update_time_avg_stats()
+            
+            if (next_event_type == ARRIVAL):
+                self.arrive()
+            elif (next_event_type == DEPARTURE):
+                self.depart()
         
-    if number_in_queue == 0:
-        server_status = False
-        time_next_event_departure = math.inf
+        if checkpointer is not None:
+            checkpointer.remove()
+        return self.result()
+
+    def save_checkpoint(self, path, num_delays):
+        # Everything resume() needs to continue bit-identically, including the
+        # logical seed of every RNG stream and how far the trace had got. The
+        # queue's events carry no data, so only their keys are stored.
+        trace_mode = TRACE_MODES.index(self.trace_sink.mode) if self.trace_sink is not None else 0
+        trace_offset = self.trace_sink.position() if self.trace_sink is not None else -1
+        events = self.event_list.snapshot()
+        queued = self.times_of_arrival.snapshot()
+        seeds = array('q', [self.rng.get_seed(stream) for stream in range(len(self.rng.zrng))])
+        parts = [
+            CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION,
+                                   isinstance(self.event_list, CalendarQueue), trace_mode),
+            CHECKPOINT_STATE.pack(
+                self.mean_inter_arrival_time, self.mean_service_time, self.num_of_delays_required,
+                num_delays, self.stream, self.service_stream, self.server_status, self.number_in_queue,
+                self.time_of_last_event, self.total_customer_arrived, self.num_of_event,
+                self.num_of_arrival, self.num_of_departure, self.simulation_time,
+                self.num_customers_delayed, self.total_delays, self.area_num_in_queue,
+                self.area_server_status, self.times_of_arrival.high_water_mark, trace_offset,
+                self.event_list.num_scheduled, len(events), len(queued), len(seeds)),
+        ]
+        parts.extend(CHECKPOINT_EVENT.pack(time, rank, sequence, event_type)
+                     for time, rank, sequence, event_type, _ in events)
+        parts.append(queued.tobytes())
+        parts.append(seeds.tobytes())
+        write_atomically(path, b"".join(parts))
+
+    @classmethod
+    def from_checkpoint(cls, path, output_dir=OUTPUT_FILE_DIR, trace_flush_size=TRACE_FLUSH_SIZE):
+        # Rebuild a queue from save_checkpoint() and return it with the number
+        # of delays it was running to. The trace is reopened in the same
+        # format and cut back to where it was when the checkpoint was taken.
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, calendar, trace_mode = CHECKPOINT_HEADER.unpack_from(data)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a queue checkpoint")
+        (mean_inter_arrival_time, mean_service_time, num_of_delays_required, num_delays, stream,
+         service_stream, server_status, number_in_queue, time_of_last_event, total_customer_arrived, num_of_event,
+         num_of_arrival, num_of_departure, simulation_time, num_customers_delayed, total_delays,
+         area_num_in_queue, area_server_status, high_water_mark, trace_offset, num_scheduled,
+         num_events, num_queued, num_streams) = CHECKPOINT_STATE.unpack_from(data, CHECKPOINT_HEADER.size)
+        offset = CHECKPOINT_HEADER.size + CHECKPOINT_STATE.size
+        events = []
+        for time, rank, sequence, event_type in CHECKPOINT_EVENT.iter_unpack(
+                data[offset:offset + num_events * CHECKPOINT_EVENT.size]):
+            events.append((time, rank, sequence, event_type, None))
+        offset += num_events * CHECKPOINT_EVENT.size
+        queued = array('d', data[offset:offset + 8 * num_queued])
+        offset += 8 * num_queued
+        seeds = array('q', data[offset:offset + 8 * num_streams])
+
+        queue = cls(mean_inter_arrival_time, mean_service_time, num_of_delays_required, stream=stream,
+                    event_list_factory=CalendarQueue if calendar else FutureEventList,
+                    service_stream=service_stream)
+        for index, seed in enumerate(seeds):
+            queue.rng.set_seed(seed, index)
+        queue.event_list.restore(events, num_scheduled)
+        queue.times_of_arrival = ArrivalTimeBuffer.from_times(queued, high_water_mark)
+        queue.server_status = server_status
+        queue.number_in_queue = number_in_queue
+        queue.time_of_last_event = time_of_last_event
+        queue.total_customer_arrived = total_customer_arrived
+        queue.num_of_event = num_of_event
+        queue.num_of_arrival = num_of_arrival
+        queue.num_of_departure = num_of_departure
+        queue.simulation_time = simulation_time
+        queue.num_customers_delayed = num_customers_delayed
+        queue.total_delays = total_delays
+        queue.area_num_in_queue = area_num_in_queue
+        queue.area_server_status = area_server_status
+        queue.trace_sink = open_trace_sink(TRACE_MODES[trace_mode], output_dir, trace_flush_size)
+        if queue.trace_sink is not None:
+            queue.trace_sink.truncate(trace_offset)
+        return queue, num_delays
+
+
+def run_replication(config, seed):
+    # One independent replication on the stream-1 substream starting at
+    # `seed`: its REPLICATION_STATISTICS and the number of uniforms it drew
+    rng = PMMLCG(buffer_size=RNG_BUFFER_SIZE)
+    rng.set_seed(seed, 1)
+    queue = SingleServerQueue(*config, rng=rng)
+    result = queue.run()
+    return [getattr(result, name) for name in REPLICATION_STATISTICS], queue.num_draws()
+
+
+def confidence_interval(samples, confidence=0.95):
+    # Sample mean and t-based half-width of the confidence interval
+    samples = np.asarray(samples, dtype=float)
+    mean = samples.mean()
+    if len(samples) < 2:
+        return mean, math.inf
+    t_value = stats.t.ppf((1 + confidence) / 2, len(samples) - 1)
+    return mean, t_value * samples.std(ddof=1) / math.sqrt(len(samples))
+
+
+class ReplicationSummary:
+    __slots__ = ("num_replications", "confidence", "means", "half_widths")
+
+    def __init__(self, samples, confidence):
+        # samples holds one row of REPLICATION_STATISTICS per replication
+        self.num_replications = len(samples)
+        self.confidence = confidence
+        self.means = {}
+        self.half_widths = {}
+        for name, column in zip(REPLICATION_STATISTICS, zip(*samples)):
+            self.means[name], self.half_widths[name] = confidence_interval(column, confidence)
+
+    def relative_half_width(self):
+        # Widest half-width relative to its mean, over all statistics
+        widest = 0.0
+        for name in REPLICATION_STATISTICS:
+            mean, half_width = abs(self.means[name]), self.half_widths[name]
+            if half_width > 0:
+                widest = max(widest, half_width / mean if mean > 0 else math.inf)
+        return widest
+
+
+class SteadyStateQueue(SingleServerQueue):
+    # A queue that, every MSER_BATCH_SIZE delays, records the running totals
+    # (delays, area under Q(t), area under B(t), clock). Differences of the
+    # totals give the mean of any run of customers, so warm-up deletion and
+    # batching can be decided after the run without keeping every delay.
+    __slots__ = ("marks",)
+
+    def initialize_simulation(self):
+        super().initialize_simulation()
+        self.marks = array('d', (0.0, 0.0, 0.0, 0.0))
+
+    def inc_num_customer_delayed(self):
+        super().inc_num_customer_delayed()
+        if self.num_customers_delayed % MSER_BATCH_SIZE == 0:
+            self.marks.extend((self.total_delays, self.area_num_in_queue, self.area_server_status, self.simulation_time))
+
+    def observations(self):
+        # One row per group of MSER_BATCH_SIZE customers: their mean delay, and
+        # the time-average number in queue and server utilization while they
+        # were delayed
+        marks = np.frombuffer(self.marks, dtype=float).reshape(-1, 4)
+        delays, areas_in_queue, areas_busy, times = np.diff(marks, axis=0).T
+        return np.column_stack((delays / MSER_BATCH_SIZE, areas_in_queue / times, areas_busy / times))
+
+
+def mser_truncation(observations):
+    # MSER warm-up point: the number of leading observations d <= n/2 whose
+    # deletion minimizes the squared standard error of the mean of the rest,
+    # sum((Z[d:] - mean(Z[d:]))^2) / (n - d)^2
+    z = np.asarray(observations, dtype=float)
+    n = len(z)
+    suffix_sum = np.cumsum(z[::-1])[::-1]
+    suffix_sum_squares = np.cumsum((z * z)[::-1])[::-1]
+    remaining = n - np.arange(n)
+    standard_error = (suffix_sum_squares - suffix_sum ** 2 / remaining) / remaining ** 2
+    return int(np.argmin(standard_error[:n // 2 + 1]))
+
+
+class SteadyStateSummary(ReplicationSummary):
+    # Batch-means confidence intervals from one long run after warm-up deletion.
+    # Each batch mean plays the part of a replication.
+    __slots__ = ("num_customers", "warmup_customers", "batch_customers", "lag1_autocorrelation")
+
+    def __init__(self, batch_means, confidence, num_customers, warmup_customers, batch_customers):
+        super().__init__(batch_means, confidence)
+        self.num_customers = num_customers
+        self.warmup_customers = warmup_customers
+        self.batch_customers = batch_customers
+        # Should be near 0; a large value means the batches are too short to be independent
+        self.lag1_autocorrelation = {}
+        for name, column in zip(REPLICATION_STATISTICS, np.asarray(batch_means).T):
+            deviations = column - column.mean()
+            denominator = np.dot(deviations, deviations)
+            self.lag1_autocorrelation[name] = (
+                float(np.dot(deviations[:-1], deviations[1:]) / denominator) if denominator > 0 else 0.0)
+
+
+def steady_state(config, num_customers, num_batches=STEADY_STATE_BATCHES, confidence=0.95, rng=None):
+    # Simulate one run of num_customers delays, delete the MSER-5 warm-up
+    # (the longest one over the three statistics) and compute num_batches
+    # batch means of what is left
+    queue = SteadyStateQueue(config[0], config[1], num_customers, rng=rng)
+    queue.run()
+    observations = queue.observations()
+    warmup = max(mser_truncation(column) for column in observations.T)
+    batch_size = (len(observations) - warmup) // num_batches
+    if batch_size < 1:
+        raise ValueError(f"{num_customers} customers leave fewer than {num_batches} "
+                         f"groups of {MSER_BATCH_SIZE} after the warm-up")
+    # Batches end at the last complete group; any remainder goes to the warm-up
+    warmup = len(observations) - num_batches * batch_size
+    marks = np.frombuffer(queue.marks, dtype=float).reshape(-1, 4)[warmup::batch_size]
+    delays, areas_in_queue, areas_busy, times = np.diff(marks, axis=0).T
+    batch_customers = batch_size * MSER_BATCH_SIZE
+    batch_means = np.column_stack((delays / batch_customers, areas_in_queue / times, areas_busy / times))
+    return SteadyStateSummary(batch_means, confidence, queue.num_customers_delayed,
+                              warmup * MSER_BATCH_SIZE, batch_customers)
+
+
+def exponential_block(rng, stream, mean, n):
+    # The next n values SingleServerQueue.exponen() would return from the stream
+    return variates.exponential(rng.generate_block(stream, n), mean, decimals=6)
+
+
+def fast_fifo(config, rng=None, stream=1, service_stream=FAST_FIFO_SERVICE_STREAM, chunk_size=FAST_FIFO_CHUNK):
+    # FIFO M/M/1 without an event loop: with inter-arrival times from `stream`
+    # and service times from `service_stream` it gives the QueueResult of
+    # SingleServerQueue(..., stream=stream, service_stream=service_stream),
+    # up to floating-point rounding. Service of customer i starts at
+    # max(a_i, d_{i-1}), which for a chunk with service sums C is
+    #     C_{i-1} + max(d_prev, max_{k<=i}(a_k - C_{k-1}))
+    # the Lindley recursion as a cumulative sum and a running maximum.
+    mean_inter_arrival_time, mean_service_time, num_customers = config
+    rng = PMMLCG(buffer_size=RNG_BUFFER_SIZE) if rng is None else rng
+    last_arrival = 0.0
+    last_departure = 0.0
+    total_delays = 0.0
+    area_server_status = 0.0
+    for first in range(0, num_customers, chunk_size):
+        n = min(chunk_size, num_customers - first)
+        # Prepending the previous arrival keeps cumsum's additions in the
+        # event loop's order, so arrival times match it exactly
+        gaps = exponential_block(rng, stream, mean_inter_arrival_time, n)
+        arrivals = np.cumsum(np.concatenate(([last_arrival], gaps)))[1:]
+        services = exponential_block(rng, service_stream, mean_service_time, n)
+        services_before = np.concatenate(([0.0], np.cumsum(services)[:-1]))
+        starts = services_before + np.maximum.accumulate(np.maximum(arrivals - services_before, last_departure))
+        total_delays += (starts - arrivals).sum()
+        area_server_status += services.sum()
+        last_arrival = arrivals[-1]
+        last_departure = starts[-1] + services[-1]
+    
+    # The run ends when the last customer starts service, so their service
+    # does not count, while later arrivals are still waiting in queue
+    simulation_time = starts[-1]
+    area_server_status -= services[-1]
+    area_num_in_queue = total_delays
+    n = 1024
+    while last_arrival < simulation_time:
+        gaps = exponential_block(rng, stream, mean_inter_arrival_time, n)
+        arrivals = np.cumsum(np.concatenate(([last_arrival], gaps)))[1:]
+        area_num_in_queue += (simulation_time - arrivals[arrivals < simulation_time]).sum()
+        last_arrival = arrivals[-1]
+        n = min(2 * n, chunk_size)
+    return QueueResult(total_delays / num_customers, area_num_in_queue / simulation_time,
+                       area_server_status / simulation_time, simulation_time)
+
+
+def replicate(config, n_reps, workers=None, confidence=0.95,
+              target_relative_half_width=None, max_reps=MAX_REPLICATIONS):
+    # Run n_reps independent replications over a process pool, replication i
+    # on substream i so results do not depend on scheduling. With a target
+    # relative half-width, keep adding one batch of `workers` replications
+    # until every statistic meets it or max_reps is reached. The first n_reps
+    # always run, even past max_reps.
+    if target_relative_half_width is None:
+        max_reps = n_reps
     else:
-        number_in_queue -= 1
-        total_delays += (simulation_time - times_of_arrival.get())
+        max_reps = max(max_reps, n_reps)
+    # Split stream 1 into one substream per possible replication. A run of n
+    # delays draws an inter-arrival time per arrival plus one, and a service
+    # time per customer delayed (see num_draws()). Arrivals are the n delayed
+    # customers plus those still queued, and the queue never holds more than
+    # n ('Queue is Full!!'), so a run draws at most 3n + 1 uniforms however
+    # overloaded the server is. The draws each replication actually made are
+    # checked as well, since the queue limit is an assert.
+    factory = SubstreamFactory(length=(PMMLCG.MODLUS - 1) // max_reps)
+    if 3 * config[2] + 1 > factory.length:
+        raise ValueError(f"{max_reps} replications of {config[2]} customers would overlap substreams")
+    batch_size = workers or os.cpu_count() or 1
+    samples = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        num_reps = n_reps
+        while True:
+            seeds = [factory.seed(i) for i in range(len(samples), num_reps)]
+            for statistics, num_draws in executor.map(run_replication, itertools.repeat(config), seeds):
+                if num_draws > factory.length:
+                    raise ValueError(f"A replication drew {num_draws} uniforms, more than the "
+                                     f"{factory.length} of its substream")
+                samples.append(statistics)
+            summary = ReplicationSummary(samples, confidence)
+            if (target_relative_half_width is None
+                    or len(samples) >= max_reps
+                    or summary.relative_half_width() <= target_relative_half_width):
+                return summary
+            num_reps = min(len(samples) + batch_size, max_reps)
+
+
+def queue_cache_entry(model, config, rng, streams):
+    # Key and details for the result cache of a run of `model` on config whose
+    # random numbers start from the current seeds of `streams`
+    mean_inter_arrival_time, mean_service_time, num_customers = config
+    params = {"mean_inter_arrival_time": mean_inter_arrival_time, "mean_service_time": mean_service_time,
+              "num_of_delays_required": num_customers}
+    seed = [rng.get_seed(stream) for stream in streams]
+    version = result_cache.code_version(__file__, variates.__file__, pmmlcg.__file__, event_list.__file__)
+    return result_cache.result_key(model, params, seed, version), (model, params, seed, version)
+
+
+def load_queue_result(cache, entry):
+    # The cached QueueResult of a queue_cache_entry(), or None
+    columns = cache.get(entry[0])
+    cache.flush()
+    if columns is None:
+        return None
+    return QueueResult(*(float(columns[name]) for name in QueueResult.__slots__))
+
+
+def store_queue_result(cache, entry, result):
+    cache.put(entry[0], *entry[1], {name: getattr(result, name) for name in QueueResult.__slots__})
+    cache.flush()
+
+
+def generate_report(result):
+    with open(OUTPUT_FILE_DIR+RESULT_FILE, "a+") as report:
+        report.write(
+            f'\nAvg delay in queue: {format(result.avg_delay_in_queue, ".6f")} minutes\n'
+            f'Avg number in queue: {format(result.avg_number_in_queue, ".6f")}\n'
+            f'Server utilization: {format(result.server_utilization, ".6f")}\n'
+            f'Time simulation ended: {format(result.simulation_time, ".6f")} minutes\n'
+        )
         
-        inc_num_customer_delayed()
-        time_next_event_departure = simulation_time + exponen(mean_service_time)
+def generate_replication_report(summary):
+    means, half_widths = summary.means, summary.half_widths
+    with open(OUTPUT_FILE_DIR+RESULT_FILE, "a+") as report:
+        report.write(
+            f'\nReplications: {summary.num_replications} '
+            f'({format(summary.confidence * 100, "g")}% confidence intervals)\n'
+            f'Avg delay in queue: {format(means["avg_delay_in_queue"], ".6f")} '
+            f'+/- {format(half_widths["avg_delay_in_queue"], ".6f")} minutes\n'
+            f'Avg number in queue: {format(means["avg_number_in_queue"], ".6f")} '
+            f'+/- {format(half_widths["avg_number_in_queue"], ".6f")}\n'
+            f'Server utilization: {format(means["server_utilization"], ".6f")} '
+            f'+/- {format(half_widths["server_utilization"], ".6f")}\n'
+        )
         
-def generate_report():
-    with open(OUTPUT_FILE_DIR+RESULT_FILE, "a+") as result:
-        result.write(
-            f'\nAvg delay in queue: {format(total_delays/num_customers_delayed, ".6f")} minutes\n'
-            f'Avg number in queue: {format(area_num_in_queue/simulation_time, ".6f")}\n'
-            f'Server utilization: {format(area_server_status/simulation_time, ".6f")}\n'
-            f'Time simulation ended: {format(simulation_time, ".6f")} minutes\n'
+def generate_steady_state_report(summary):
+    means, half_widths = summary.means, summary.half_widths
+    autocorrelation = summary.lag1_autocorrelation
+    with open(OUTPUT_FILE_DIR+RESULT_FILE, "a+") as report:
+        report.write(
+            f'\nSteady state: {summary.num_customers} customers, first {summary.warmup_customers} '
+            f'deleted as warm-up (MSER-{MSER_BATCH_SIZE})\n'
+            f'Batch means: {summary.num_replications} batches of {summary.batch_customers} customers '
+            f'({format(summary.confidence * 100, "g")}% confidence intervals)\n'
+            f'Avg delay in queue: {format(means["avg_delay_in_queue"], ".6f")} '
+            f'+/- {format(half_widths["avg_delay_in_queue"], ".6f")} minutes\n'
+            f'Avg number in queue: {format(means["avg_number_in_queue"], ".6f")} '
+            f'+/- {format(half_widths["avg_number_in_queue"], ".6f")}\n'
+            f'Server utilization: {format(means["server_utilization"], ".6f")} '
+            f'+/- {format(half_widths["server_utilization"], ".6f")}\n'
+            f'Lag-1 autocorrelation of the batch means: '
+            f'{", ".join(format(autocorrelation[name], ".3f") for name in REPLICATION_STATISTICS)}\n'
         )
         
-def main():
-    # Reading inputs from `in.txt`
-    with open(INPUT_FILE_DIR, "r") as inputs:
-        inputs = inputs.read().split(' ')
-        # print(inputs)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Single-Server Queueing System")
+    parser.add_argument("--trace", choices=["off", "text", "binary"], default="text",
+                        help="event log format (default: text, written to event_orders.txt)")
+    parser.add_argument("--trace-flush-size", type=int, default=TRACE_FLUSH_SIZE,
+                        help="trace records buffered before each write")
+    parser.add_argument("--decode-trace", metavar="BINARY_FILE",
+                        help="convert a binary trace to event_orders.txt and exit")
+    parser.add_argument("--replications", type=int, default=0,
+                        help="run this many independent replications and report confidence intervals")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes used for replications (default: all cores)")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="confidence level of the replication intervals")
+    parser.add_argument("--target-half-width", type=float, default=None,
+                        help="keep adding replications until every relative half-width is at most this "
+                             f"or there are max({MAX_REPLICATIONS}, --replications)")
+    parser.add_argument("--fast-fifo", action="store_true",
+                        help="compute the FIFO queue with array operations instead of the event loop "
+                             f"(service times from stream {FAST_FIFO_SERVICE_STREAM})")
+    parser.add_argument("--steady-state", type=int, metavar="CUSTOMERS", default=None,
+                        help="estimate steady-state means from one run of this many customers by batch means")
+    parser.add_argument("--batches", type=int, default=STEADY_STATE_BATCHES,
+                        help="number of batch means in steady-state mode")
+    parser.add_argument("--profile", metavar="JSON_FILE",
+                        help="time the event loop, handlers, RNG and tracing and write a JSON summary; "
+                             "not with --replications, --fast-fifo, --steady-state or --cache")
+    parser.add_argument("--checkpoint-events", type=int, default=None,
+                        help="save a checkpoint every this many events")
+    parser.add_argument("--checkpoint-seconds", type=float, default=None,
+                        help="save a checkpoint every this many seconds")
+    parser.add_argument("--checkpoint-file", default=OUTPUT_FILE_DIR + CHECKPOINT_FILE,
+                        help="where checkpoints are saved and resumed from")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the run saved in the checkpoint file")
+    result_cache.add_cache_arguments(parser, "reuse the result of an identical earlier run (event loop or fast FIFO); "
+                                             "a cached event-loop run writes no trace")
+    args = parser.parse_args()
+    if args.profile:
+        # These modes skip the event loop, or may serve it from the cache
+        for flag, used in (("--replications", args.replications), ("--fast-fifo", args.fast_fifo),
+                           ("--steady-state", args.steady_state), ("--cache", args.cache)):
+            if used:
+                parser.error(f"--profile times the event loop, which {flag} can skip")
+    return args
 
-    mean_inter_arrival_time = float(inputs[0])
-    mean_service_time = float(inputs[1])
-    num_of_delays_required = int(inputs[2])
+def main():
+    args = parse_args()
+    if args.decode_trace:
+        return decode_trace(args.decode_trace, OUTPUT_FILE_DIR+EVENT_ORDERS_FILE)
     
-    if not os.path.exists(OUTPUT_FILE_DIR):
-            os.makedirs(OUTPUT_FILE_DIR)
-    with open(OUTPUT_FILE_DIR+RESULT_FILE, "a+") as results:
-        results.write(
-            f'----Single-Server Queueing System----\n\n'
-            f'Mean inter-arrival time: {format(mean_inter_arrival_time, ".6f")} minutes\n'
-            f'Mean service time: {format(mean_service_time, ".6f")} minutes\n'
-            f'Number of customers: {num_of_delays_required}\n'
-        )
+    profiler = Profiler() if args.profile else None
+    queue_class = SingleServerQueue
+    if profiler is not None:
+        queue_class = profiler.instrument_class(SingleServerQueue, PROFILED_METHODS)
     
-    # Initialize the Simulation
-    initialize_simulation(mean_inter_arrival_time)
+    checkpointer = None
+    if args.checkpoint_events or args.checkpoint_seconds:
+        checkpointer = Checkpointer(args.checkpoint_file, args.checkpoint_events, args.checkpoint_seconds)
     
-    global num_of_event
-    while (num_customers_delayed < num_of_delays_required):
-        num_of_event += 1
+    cache = None
+    if args.cache and not args.resume:
+        cache = result_cache.ResultCache.from_args(args)
+    
+    if args.resume:
+        # The results header and the trace up to the checkpoint were written
+        # by the interrupted run
+        queue, num_delays = queue_class.from_checkpoint(args.checkpoint_file, OUTPUT_FILE_DIR, args.trace_flush_size)
+    else:
+        # Reading inputs from `in.txt`
+        queue = queue_class.from_input_file(INPUT_FILE_DIR)
+        num_delays = queue.num_of_delays_required
         
-        next_event_type = timing()
-        update_time_avg_stats()
+        if not os.path.exists(OUTPUT_FILE_DIR):
+                os.makedirs(OUTPUT_FILE_DIR)
+        with open(OUTPUT_FILE_DIR+RESULT_FILE, "a+") as results:
+            results.write(
+                f'----Single-Server Queueing System----\n\n'
+                f'Mean inter-arrival time: {format(queue.mean_inter_arrival_time, ".6f")} minutes\n'
+                f'Mean service time: {format(queue.mean_service_time, ".6f")} minutes\n'
+                f'Number of customers: {queue.num_of_delays_required}\n'
+            )
         
-        if (next_event_type == 1):
-            arrive(mean_inter_arrival_time, mean_service_time, num_of_delays_required)
-        elif (next_event_type == 2):
-            depart(mean_service_time)
+        config = (queue.mean_inter_arrival_time, queue.mean_service_time, queue.num_of_delays_required)
+        if args.replications:
+            summary = replicate(config, args.replications, args.workers, args.confidence, args.target_half_width)
+            return generate_replication_report(summary)
+        if args.fast_fifo:
+            rng = PMMLCG(buffer_size=RNG_BUFFER_SIZE)
+            entry = None
+            if cache is not None:
+                entry = queue_cache_entry("queue-fast-fifo", config, rng, (1, FAST_FIFO_SERVICE_STREAM))
+                result = load_queue_result(cache, entry)
+                if result is not None:
+                    return generate_report(result)
+            result = fast_fifo(config, rng)
+            if entry is not None:
+                store_queue_result(cache, entry, result)
+            return generate_report(result)
+        if args.steady_state:
+            summary = steady_state(config, args.steady_state, args.batches, args.confidence)
+            return generate_steady_state_report(summary)
+        
+        entry = None
+        if cache is not None:
+            entry = queue_cache_entry("queue", config, queue.rng,
+                                      dict.fromkeys((queue.stream, queue.service_stream)))
+            result = load_queue_result(cache, entry)
+            if result is not None:
+                return generate_report(result)
+        queue.trace_sink = open_trace_sink(args.trace, OUTPUT_FILE_DIR, args.trace_flush_size)
+    
+    if profiler is not None:
+        profiler.instrument(queue.rng, ["generate"], "rng.")
+        if queue.trace_sink is not None:
+            profiler.instrument(queue.trace_sink, ["record"], "trace.")
+        profiler.start()
+    try:
+        if not args.resume:
+            queue.initialize_simulation()
+        result = queue.resume(num_delays, checkpointer)
+    finally:
+        if queue.trace_sink is not None:
+            queue.trace_sink.close()
+    if profiler is not None:
+        profiler.stop()
+        profiler.write(args.profile, "SingleServerQueue", EVENT_HANDLERS)
+    if args.resume:
+        # resume() only removes the checkpoint through a checkpointer
+        remove_checkpoint(args.checkpoint_file)
+    if cache is not None:
+        store_queue_result(cache, entry, result)
     
-    return generate_report()
+    return generate_report(result)
             
 if __name__ == "__main__":
     main()
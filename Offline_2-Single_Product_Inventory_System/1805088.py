@@ -1,7 +1,26 @@
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import itertools
 import math
 import numpy as np
 from queue import Queue
 import os
+import struct
+import sys
+
+# checkpointing.py, event_list.py, pmmlcg.py, profiling.py, variates.py and
+# result_cache.py at the top of the repository are shared by the simulators
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from checkpointing import Checkpointer, remove_checkpoint, write_atomically
+import event_list
+from event_list import CalendarQueue, FutureEventList
+import pmmlcg
+from pmmlcg import PMMLCG, SubstreamFactory
+from profiling import Profiler
+import result_cache
+import variates
 
 INPUT_FILE_DIR = "./in.txt"
 OUTPUT_FILE_DIR = "./out.txt"
@@ -14,57 +33,35 @@ EVALUATE = 4
 
 INFINITE = 1.0e+30
 
-class PMMLCG:
-    MODLUS = 2147483647
-    MULT1 = 24112
-    MULT2 = 26143
-
-    def __init__(self):
-        self.zrng = [
-            1, 1973272912, 281629770, 20006270, 1280689831, 2096730329, 1933576050,
-            913566091, 246780520, 1363774876, 604901985, 1511192140, 1259851944,
-            824064364, 150493284, 242708531, 75253171, 1964472944, 1202299975,
-            233217322, 1911216000, 726370533, 403498145, 993232223, 1103205531,
-            762430696, 1922803170, 1385516923, 76271663, 413682397, 726466604,
-            336157058, 1432650381, 1120463904, 595778810, 877722890, 1046574445,
-            68911991, 2088367019, 748545416, 622401386, 2122378830, 640690903,
-            1774806513, 2132545692, 2079249579, 78130110, 852776735, 1187867272,
-            1351423507, 1645973084, 1997049139, 922510944, 2045512870, 898585771,
-            243649545, 1004818771, 773686062, 403188473, 372279877, 1901633463,
-            498067494, 2087759558, 493157915, 597104727, 1530940798, 1814496276,
-            536444882, 1663153658, 855503735, 67784357, 1432404475, 619691088,
-            119025595, 880802310, 176192644, 1116780070, 277854671, 1366580350,
-            1142483975, 2026948561, 1053920743, 786262391, 1792203830, 1494667770,
-            1923011392, 1433700034, 1244184613, 1147297105, 539712780, 1545929719,
-            190641742, 1645390429, 264907697, 620389253, 1502074852, 927711160,
-            364849192, 2049576050, 638580085, 547070247
-        ]
+# Stream for delivery lags in policy sweeps, keeping stream 1 for demands only
+LAG_STREAM = 2
+# Methods timed by --profile, and the handler of each event type
+PROFILED_METHODS = ("timing", "update_time_avg_stats", "order_arrival", "demand", "evaluate", "report",
+                    "exponen", "uniform", "random_integer")
+EVENT_HANDLERS = {"order_arrival": "order_arrival", "demand": "demand", "evaluate": "evaluate", "end": "report"}
+# Standard deviations above its mean the number of demands in a replication
+# is assumed not to exceed when sizing the optimizer's substreams
+DEMAND_COUNT_MARGIN = 10
 
-    def generate(self, stream):
-        zi = self.zrng[stream]
-        lowprd = (zi & 65535) * self.MULT1
-        hi31 = (zi >> 16) * self.MULT1 + (lowprd >> 16)
-        zi = ((lowprd & 65535) - self.MODLUS) + ((hi31 & 32767) << 16) + (hi31 >> 15)
-        if zi < 0:
-            zi += self.MODLUS
-        lowprd = (zi & 65535) * self.MULT2
-        hi31 = (zi >> 16) * self.MULT2 + (lowprd >> 16)
-        zi = ((lowprd & 65535) - self.MODLUS) + ((hi31 & 32767) << 16) + (hi31 >> 15)
-        if zi < 0:
-            zi += self.MODLUS
-        self.zrng[stream] = zi
-        return (zi >> 7 | 1) / 16777216.0
+# Checkpoints: a header (magic, version, event list kind), the CHECKPOINT_STATE
+# scalars, one CHECKPOINT_EVENT per pending event and the seed of every
+# PMMLCG stream
+CHECKPOINT_FILE = "./checkpoint.bin"
+CHECKPOINT_MAGIC = b"SPIC"
+CHECKPOINT_VERSION = 1
+CHECKPOINT_HEADER = struct.Struct("<4sHBx")
+CHECKPOINT_STATE = struct.Struct("<QqqqqdddddQQqqQQ")
+CHECKPOINT_EVENT = struct.Struct("<dqQB?q")
 
-    def set_seed(self, zset, stream):
-        self.zrng[stream] = zset
-
-    def get_seed(self, stream):
-        return self.zrng[stream]
+# Number of uniforms PMMLCG generates per block for each stream
+RNG_BUFFER_SIZE = 4096
 
 
 # Create Single Product Inventory System
 class SPIS:
-    def __init__(self, input_file_path, output_file_path, num_of_events = 4):
+    def __init__(self, input_file_path, output_file_path, num_of_events = 4,
+                 event_list_factory = FutureEventList, multiple_orders = False, lag_stream = 1,
+                 demand_method = "inversion", cache = None):
         with open(input_file_path, "r") as input_file:
             input = input_file.readline()
             self.initial_inventory_level, self.num_of_months, self.num_of_policies = map(int, input.split(' '))
@@ -80,14 +77,33 @@ class SPIS:
             
             input = input_file.readline()
             self.cum_prob_of_sequential_demand = list(map(float, input.split(' ')))
+            # Demand sizes 1..num_of_demand_sizes. Inversion draws the sizes the
+            # original linear walk over the cumulative probabilities did; an
+            # alias table draws in O(1) but gives different sizes.
+            self.demand_size_distribution = variates.DiscreteDistribution(
+                range(1, self.num_of_demand_sizes + 1), cumulative=self.cum_prob_of_sequential_demand,
+                method=demand_method)
             
             self.policies = []
             for policies in range(self.num_of_policies):
                 input = input_file.readline()
                 self.policies.append(list(map(int, input.split(' '))))
                 
-            self.output_file = open(output_file_path, "a+")
+            # Without an output file the costs are only returned by simulation()
+            self.output_file = open(output_file_path, "a+") if output_file_path is not None else None
             self.num_of_events = num_of_events
+            # Without multiple_orders a new order replaces the outstanding one,
+            # as in the original model. With it, every order arrives on its own.
+            self.multiple_orders = multiple_orders
+            # Drawing delivery lags from their own stream keeps the demand stream
+            # identical whatever orders a policy places
+            self.lag_stream = lag_stream
+            # An optional result_cache.ResultCache that simulation() looks
+            # each policy up in before simulating it. The policies it does
+            # simulate wait in pending_results until store_results() writes
+            # them to the cache together.
+            self.cache = cache
+            self.pending_results = []
             
             # Initialize hyperparameters
             self.amount = 0
@@ -100,10 +116,16 @@ class SPIS:
             self.area_shortage = 0.0
             self.simulation_time = 0.0
             self.time_of_last_event = 0.0
-            self.time_next_event = [0.0] * (self.num_of_events + 1)
+            self.event_list = event_list_factory()
+            self.next_event_data = None
+            self.pending_order = None
             self.total_ordering_cost = 0.0
+            # Events handled over all simulations, and the position in
+            # self.policies of the one running; both go into checkpoints
+            self.num_of_event = 0
+            self.policy_index = 0
                         
-            self.prime_mod_generator = PMMLCG()
+            self.prime_mod_generator = PMMLCG(buffer_size=RNG_BUFFER_SIZE)
             
     def reportInputParams(self):
         self.output_file.write(f"------Single-Product Inventory System------\n\n")
@@ -144,27 +166,22 @@ class SPIS:
         self.area_holding = 0.0
         self.area_shortage = 0.0
         
-        # Initialize the event list. Since no order is outstanding, the orderarrival 
-        # event is eliminated from consideration
-        self.time_next_event[ORDER_ARRIVAL] = INFINITE
-        self.time_next_event[DEMAND] = self.simulation_time + self.exponen(self.mean_inter_demand)
-        self.time_next_event[EVALUATE] = 0.0
-        self.time_next_event[END] = self.num_of_months
-        
-    def timing(self):        
-        min_next_event_time = 1.0e+29
-        self.next_event_type = NONE
+        # Initialize the event list. Since no order is outstanding, no order-arrival
+        # event is scheduled
+        self.event_list.clear()
+        self.pending_order = None
+        self.event_list.schedule(self.simulation_time + self.exponen(self.mean_inter_demand), DEMAND)
+        self.event_list.schedule(0.0, EVALUATE)
+        self.event_list.schedule(self.num_of_months, END)
         
-        for event_no in range(1, self.num_of_events+1):
-            if(self.time_next_event[event_no] < min_next_event_time):
-                min_next_event_time = self.time_next_event[event_no]
-                self.next_event_type = event_no
-         
-        if(self.next_event_type == NONE):
+    def timing(self):
+        # Events at the same time run in event-type order, as they did when
+        # timing() scanned the event types linearly
+        if len(self.event_list) == 0:
             print("No event left in Event List!!")
             exit()
                    
-        self.simulation_time = min_next_event_time
+        self.simulation_time, self.next_event_type, self.next_event_data = self.event_list.pop()
         
     def update_time_avg_stats(self):     
         # Determine the status of the inventory level during the previous interval.
@@ -178,31 +195,24 @@ class SPIS:
         
         self.time_of_last_event = self.simulation_time
         
-    def order_arrival(self):
+    def order_arrival(self, amount):
         # Increment the inventory level by the amount ordered
-        self.inventory_level += self.amount
-        
-        # Since no order is now outstanding, eliminate the 
-        # order-arrival event from consideration
-        self.time_next_event[ORDER_ARRIVAL] = INFINITE
+        self.inventory_level += amount
+        self.pending_order = None
     
-    def random_integer(self, probability_distributions):
-        u = self.prime_mod_generator.generate(1)
-        i = 0
-        while u >= probability_distributions[i]:
-            i = i + 1
-        return i + 1
+    def random_integer(self, distribution):
+        return distribution.draw(self.prime_mod_generator.generate(1))
         
     def demand(self):
         # Decrement the inventory level by a generated demand size
-        self.inventory_level -= self.random_integer(self.cum_prob_of_sequential_demand)
+        self.inventory_level -= self.random_integer(self.demand_size_distribution)
 
         # Schedule the time of the next demand
-        self.time_next_event[DEMAND] = self.simulation_time + self.exponen(self.mean_inter_demand)
+        self.event_list.schedule(self.simulation_time + self.exponen(self.mean_inter_demand), DEMAND)
     
-    def uniform(self, a, b):
+    def uniform(self, a, b, stream=1):
         # Return a U(a,b) random variate
-        return a + self.prime_mod_generator.generate(1) * (b - a)
+        return a + self.prime_mod_generator.generate(stream) * (b - a)
        
     def evaluate(self):
         # Check whether the inventory level is less than smalls
@@ -212,29 +222,109 @@ class SPIS:
             self.amount = self.bigs - self.inventory_level
             self.total_ordering_cost += self.setup_cost + self.per_unit_incremental_cost * self.amount
             
-            # Schedule the arrival of the order
-            self.time_next_event[ORDER_ARRIVAL] = self.simulation_time + self.uniform(self.min_lag, self.max_lag)
+            # Schedule the arrival of the order. In the single-order model it
+            # supersedes any order still outstanding.
+            if self.pending_order is not None and not self.multiple_orders:
+                self.event_list.cancel(self.pending_order)
+            self.pending_order = self.event_list.schedule(
+                self.simulation_time + self.uniform(self.min_lag, self.max_lag, self.lag_stream), ORDER_ARRIVAL, self.amount)
 
         # Regardless of the place-order decision, schedule 
         # the next inventory evaluation
-        self.time_next_event[EVALUATE] = self.simulation_time + 1.0
+        self.event_list.schedule(self.simulation_time + 1.0, EVALUATE)
         
     def report(self):
         # Compute and write estimates of desired measures of performance. */
         avg_ordering_cost = self.total_ordering_cost / self.num_of_months
         avg_holding_cost = self.holding_cost * self.area_holding / self.num_of_months
         avg_shortage_cost = self.storage_cost * self.area_shortage / self.num_of_months
-        self.output_file.write("(%2d,%3d) %19.2f %19.2f %19.2f %19.2f\n\n" % (self.smalls, self.bigs, avg_ordering_cost + avg_holding_cost + avg_shortage_cost, avg_ordering_cost, avg_holding_cost, avg_shortage_cost))
+        costs = (avg_ordering_cost + avg_holding_cost + avg_shortage_cost, avg_ordering_cost, avg_holding_cost, avg_shortage_cost)
+        if self.output_file is not None:
+            self.reportPolicy((self.smalls, self.bigs), costs)
+        return costs
+    
+    def reportPolicy(self, policy, costs):
+        # costs: (avg_total_cost, avg_ordering_cost, avg_holding_cost, avg_shortage_cost)
+        self.output_file.write("(%2d,%3d) %19.2f %19.2f %19.2f %19.2f\n\n" % (policy[0], policy[1], *costs))
+    
+    def reportEnd(self):
+        self.output_file.write(f"--------------------------------------------------------------------------------------------------")
         
-    def simulation(self, policy):
+
+    def simulation(self, policy, checkpointer=None):
+        # Simulate one (s, S) policy and return the costs report() computes
         # Read the inventory policy, and initialize the simulation
         self.smalls = policy[0]
         self.bigs = policy[1]
+        entry = None
+        if self.cache is not None:
+            entry = self.cache_entry(policy)
+            cached = self.cache.get(entry[0])
+            # Sweeps store costs only; a sequential run also needs the seeds
+            # the simulation left the generator at
+            if cached is not None and "end_seeds" in cached:
+                for stream, seed in zip(self._streams(), cached["end_seeds"].tolist()):
+                    self.prime_mod_generator.set_seed(seed, stream)
+                costs = tuple(cached["costs"].tolist())
+                if self.output_file is not None:
+                    self.reportPolicy(policy, costs)
+                return costs
         self.initialize_simulation()
-        
-        # Run the simulation until it terminates after an end-simulation event
-        # (type 3) occurs
+        costs = self.resume(checkpointer)
+        if entry is not None:
+            self.pending_results.append((entry, {
+                "costs": costs,
+                "end_seeds": [self.prime_mod_generator.get_seed(stream) for stream in self._streams()]}))
+        return costs
+    
+    def store_results(self):
+        # Write the policies simulated since the last call to the result
+        # cache as one segment, rather than a segment per policy
+        if not self.pending_results:
+            return
+        model, _, _, version = self.pending_results[0][0][1]
+        self.cache.put_many(model, version, [(key, params, seeds, columns)
+                                             for (key, (_, params, seeds, _)), columns in self.pending_results])
+        self.pending_results = []
+    
+    def _streams(self):
+        return list(dict.fromkeys((1, self.lag_stream)))
+    
+    def cache_entry(self, policy, seeds=None):
+        # Key and details for the result cache of simulating `policy` from
+        # `seeds` of the demand and lag streams (default: their current seeds)
+        params = {
+            "initial_inventory_level": self.initial_inventory_level, "num_of_months": self.num_of_months,
+            "mean_inter_demand": self.mean_inter_demand,
+            "cum_prob_of_sequential_demand": self.cum_prob_of_sequential_demand,
+            "demand_method": self.demand_size_distribution.method,
+            "setup_cost": self.setup_cost, "per_unit_incremental_cost": self.per_unit_incremental_cost,
+            "holding_cost": self.holding_cost, "storage_cost": self.storage_cost,
+            "min_lag": self.min_lag, "max_lag": self.max_lag,
+            "multiple_orders": self.multiple_orders, "lag_stream": self.lag_stream,
+            "smalls": policy[0], "bigs": policy[1],
+        }
+        if seeds is None:
+            seeds = [self.prime_mod_generator.get_seed(stream) for stream in self._streams()]
+        version = result_cache.code_version(__file__, variates.__file__, pmmlcg.__file__, event_list.__file__)
+        return result_cache.result_key("inventory", params, list(seeds), version), ("inventory", params, list(seeds), version)
+    
+    def resume(self, checkpointer=None):
+        # Run the simulation from the current state, e.g. one restored by
+        # restore_checkpoint(), until it terminates after an end-simulation
+        # event (type 3) occurs. A checkpoint is saved whenever `checkpointer`
+        # says so.
+        next_check = math.inf
+        if checkpointer is not None:
+            next_check = checkpointer.last_event + checkpointer.check_interval
         while True:
+            if self.num_of_event >= next_check:
+                if checkpointer.due(self.num_of_event):
+                    self.save_checkpoint(checkpointer.path)
+                    checkpointer.saved(self.num_of_event)
+                next_check = self.num_of_event + checkpointer.check_interval
+            self.num_of_event += 1
+            
             # Determine the next event
             self.timing()
             
@@ -244,7 +334,7 @@ class SPIS:
             # Invoke the appropriate event function
             if self.next_event_type == ORDER_ARRIVAL:
                 # print("Arrival")
-                self.order_arrival()
+                self.order_arrival(self.next_event_data)
             elif self.next_event_type == DEMAND:
                 # print("Demand")
                 self.demand()
@@ -253,16 +343,368 @@ class SPIS:
                 self.evaluate()
             elif self.next_event_type == END:
                 # print("End")
-                self.report()
-                break    
+                return self.report()
+    
+    def save_checkpoint(self, path):
+        # Everything resume() needs to continue bit-identically: the policy
+        # being simulated, the clock, state and accumulators, the pending
+        # events, the logical seed of every RNG stream and the length of the
+        # output written so far
+        events = self.event_list.snapshot()
+        pending_order = self.pending_order[2] if self.pending_order is not None else -1
+        output_offset = -1
+        if self.output_file is not None:
+            self.output_file.flush()
+            output_offset = self.output_file.tell()
+        rng = self.prime_mod_generator
+        seeds = array('q', [rng.get_seed(stream) for stream in range(len(rng.zrng))])
+        parts = [
+            CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, isinstance(self.event_list, CalendarQueue)),
+            CHECKPOINT_STATE.pack(
+                self.policy_index, self.smalls, self.bigs, self.amount, self.inventory_level,
+                self.simulation_time, self.time_of_last_event, self.total_ordering_cost,
+                self.area_holding, self.area_shortage, self.num_of_event,
+                self.event_list.num_scheduled, pending_order, output_offset, len(events), len(seeds)),
+        ]
+        parts.extend(CHECKPOINT_EVENT.pack(time, rank, sequence, event_type, data is not None, data or 0)
+                     for time, rank, sequence, event_type, data in events)
+        parts.append(seeds.tobytes())
+        write_atomically(path, b"".join(parts))
+    
+    def restore_checkpoint(self, path):
+        # Load a save_checkpoint() into this system, which must have been built
+        # from the same input file, and cut the output back to where it was.
+        # resume() then continues the interrupted simulation.
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, calendar = CHECKPOINT_HEADER.unpack_from(data)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not an inventory checkpoint")
+        (self.policy_index, self.smalls, self.bigs, self.amount, self.inventory_level,
+         self.simulation_time, self.time_of_last_event, self.total_ordering_cost,
+         self.area_holding, self.area_shortage, self.num_of_event,
+         num_scheduled, pending_order, output_offset, num_events, num_streams) = CHECKPOINT_STATE.unpack_from(
+            data, CHECKPOINT_HEADER.size)
+        offset = CHECKPOINT_HEADER.size + CHECKPOINT_STATE.size
+        events = []
+        for time, rank, sequence, event_type, has_data, event_data in CHECKPOINT_EVENT.iter_unpack(
+                data[offset:offset + num_events * CHECKPOINT_EVENT.size]):
+            events.append((time, rank, sequence, event_type, event_data if has_data else None))
+        offset += num_events * CHECKPOINT_EVENT.size
+        seeds = array('q', data[offset:offset + 8 * num_streams])
+        
+        if calendar and not isinstance(self.event_list, CalendarQueue):
+            self.event_list = CalendarQueue()
+        elif not calendar and isinstance(self.event_list, CalendarQueue):
+            self.event_list = FutureEventList()
+        handles = self.event_list.restore(events, num_scheduled)
+        self.pending_order = next((entry for entry in handles if entry[2] == pending_order), None)
+        for stream, seed in enumerate(seeds):
+            self.prime_mod_generator.set_seed(seed, stream)
+        if self.output_file is not None and output_offset >= 0:
+            self.output_file.truncate(output_offset)
+
+def simulate_policies(input_file_path, policies, lag_stream=LAG_STREAM, seeds=None):
+    # Evaluate policies with common random numbers: every policy restarts the
+    # generator, and only demands draw from stream 1, so all of them see the
+    # same demand times and sizes. `seeds` optionally gives the starting
+    # (demand, lag) seeds, e.g. of one replication's substreams.
+    inventory_system = SPIS(input_file_path, None, lag_stream=lag_stream)
+    costs = []
+    for policy in policies:
+        inventory_system.prime_mod_generator = PMMLCG(buffer_size=RNG_BUFFER_SIZE)
+        if seeds is not None:
+            inventory_system.prime_mod_generator.set_seed(seeds[0], 1)
+            inventory_system.prime_mod_generator.set_seed(seeds[1], lag_stream)
+        costs.append(inventory_system.simulation(policy))
+    return costs
+
+def simulate_policies_lockstep(input_file_path, policies, lag_stream=LAG_STREAM, seeds=None):
+    # simulate_policies() for all policies at once. Under common random numbers
+    # every policy sees the same demands and the same evaluation times, and
+    # only its order arrivals differ, so the demands and evaluations are
+    # generated once and each of them updates the state of every policy as a
+    # NumPy array. With a single outstanding order per policy, at most one
+    # arrival per policy falls between two shared events; it is applied as a
+    # masked update before the shared event, as its lower event type would
+    # have it. Every policy goes through the same floating-point operations in
+    # the same order as in SPIS, so the costs equal report()'s.
+    if lag_stream == 1:
+        raise ValueError("lockstep policies need delivery lags on a stream other than the demands'")
+    model = SPIS(input_file_path, None, lag_stream=lag_stream)
+    if model.multiple_orders:
+        raise ValueError("lockstep policies support the single-order model only")
+    num_of_months = model.num_of_months
+    rng = PMMLCG(buffer_size=RNG_BUFFER_SIZE)
+    if seeds is not None:
+        rng.set_seed(seeds[0], 1)
+        rng.set_seed(seeds[1], lag_stream)
+
+    # The shared events as (time, event type, demand size), in the order the
+    # event list would give them: demands draw their size and then the time
+    # to the next demand from stream 1, evaluations happen every month from
+    # time 0, and END comes after the demands and before the evaluation at
+    # the end of the last month
+    demands = []
+    demand_time = 0.0 + -1 * model.mean_inter_demand * math.log(rng.generate(1))
+    while demand_time <= num_of_months:
+        size = model.demand_size_distribution.draw(rng.generate(1))
+        demands.append((demand_time, DEMAND, size))
+        demand_time = demand_time + -1 * model.mean_inter_demand * math.log(rng.generate(1))
+    evaluations = [(float(month), EVALUATE, 0) for month in range(num_of_months)]
+    shared_events = list(heapq.merge(demands, evaluations, [(float(num_of_months), END, 0)],
+                                     key=lambda event: event[:2]))
+    # The k-th order of every policy takes the k-th lag of the lag stream, and
+    # a policy orders at most once per evaluation
+    lags = model.min_lag + rng.generate_block(lag_stream, num_of_months) * (model.max_lag - model.min_lag)
+
+    smalls = np.array([policy[0] for policy in policies], dtype=np.int64)
+    bigs = np.array([policy[1] for policy in policies], dtype=np.int64)
+    inventory_level = np.full(len(policies), model.initial_inventory_level, dtype=np.int64)
+    time_of_last_event = np.zeros(len(policies))
+    area_holding = np.zeros(len(policies))
+    area_shortage = np.zeros(len(policies))
+    total_ordering_cost = np.zeros(len(policies))
+    order_arrival_time = np.full(len(policies), math.inf)
+    order_amount = np.zeros(len(policies), dtype=np.int64)
+    num_of_orders = np.zeros(len(policies), dtype=np.intp)
+
+    def update_time_avg_stats(simulation_time, index=slice(None)):
+        level = inventory_level[index]
+        area = level * (simulation_time - time_of_last_event[index])
+        shortage = level < 0
+        area_shortage[index] -= np.where(shortage, area, 0.0)
+        area_holding[index] += np.where(shortage, 0.0, area)
+        time_of_last_event[index] = simulation_time
+
+    for simulation_time, event_type, size in shared_events:
+        arrived = np.flatnonzero(order_arrival_time <= simulation_time)
+        if len(arrived):
+            update_time_avg_stats(order_arrival_time[arrived], arrived)
+            inventory_level[arrived] += order_amount[arrived]
+            order_arrival_time[arrived] = math.inf
+        update_time_avg_stats(simulation_time)
+        if event_type == DEMAND:
+            inventory_level -= size
+        elif event_type == EVALUATE:
+            ordering = np.flatnonzero(inventory_level < smalls)
+            amount = bigs[ordering] - inventory_level[ordering]
+            total_ordering_cost[ordering] += model.setup_cost + model.per_unit_incremental_cost * amount
+            # A new order supersedes the outstanding one
+            order_amount[ordering] = amount
+            order_arrival_time[ordering] = simulation_time + lags[num_of_orders[ordering]]
+            num_of_orders[ordering] += 1
+
+    avg_ordering_cost = total_ordering_cost / num_of_months
+    avg_holding_cost = model.holding_cost * area_holding / num_of_months
+    avg_shortage_cost = model.storage_cost * area_shortage / num_of_months
+    avg_total_cost = avg_ordering_cost + avg_holding_cost + avg_shortage_cost
+    return list(zip(avg_total_cost.tolist(), avg_ordering_cost.tolist(),
+                    avg_holding_cost.tolist(), avg_shortage_cost.tolist()))
+
+def cached_policy_costs(cache, input_file_path, policies, evaluate):
+    # The common-random-numbers costs of policies, as simulate_policies()
+    # gives them, looking every policy up in the cache and calling
+    # evaluate(input_file_path, misses) only for the ones not found
+    model = SPIS(input_file_path, None, lag_stream=LAG_STREAM)
+    entries = [model.cache_entry(policy) for policy in policies]
+    costs = []
+    for entry in entries:
+        cached = cache.get(entry[0])
+        costs.append(tuple(cached["costs"].tolist()) if cached is not None else None)
+    misses = [i for i, policy_costs in enumerate(costs) if policy_costs is None]
+    if misses:
+        for i, policy_costs in zip(misses, evaluate(input_file_path, [policies[i] for i in misses])):
+            costs[i] = tuple(policy_costs)
+        model_name, _, _, version = entries[0][1]
+        cache.put_many(model_name, version, [(entries[i][0], entries[i][1][1], entries[i][1][2], {"costs": costs[i]})
+                                             for i in misses])
+    cache.flush()
+    return costs
+
+def sweep_policies(input_file_path, policies, workers=None, chunk_size=None):
+    # Evaluate policies in parallel with common random numbers. The costs come
+    # back in the order of `policies`, however the chunks were scheduled.
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(policies) / (4 * (workers or os.cpu_count() or 1))))
+    chunks = [policies[i:i + chunk_size] for i in range(0, len(policies), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(simulate_policies, itertools.repeat(input_file_path), chunks)
+        return [costs for chunk in results for costs in chunk]
+
+class PolicySearchResult:
+    def __init__(self, policy, costs, num_of_replications, simulated_months, brute_force_months):
+        self.policy = policy
+        # Mean (avg_total_cost, avg_ordering_cost, avg_holding_cost, avg_shortage_cost)
+        self.costs = costs
+        self.num_of_replications = num_of_replications
+        self.simulated_months = simulated_months
+        # Months a full grid evaluation with as many replications would take
+        self.brute_force_months = brute_force_months
+
+def halving_replications(num_of_policies, initial_reps, eta):
+    # Replications per policy in the last round of optimize_policies()
+    num_of_reps = initial_reps
+    while num_of_policies > 1:
+        num_of_policies = math.ceil(num_of_policies / eta)
+        if num_of_policies > 1:
+            num_of_reps *= eta
+    return num_of_reps
+
+def replication_draws(model):
+    # Uniforms one replication of `model` may draw from the demand and the lag
+    # stream. Each demand draws its size and the time to the next one. Their
+    # number is Poisson with mean num_of_months / mean_inter_demand, and
+    # exceeds it by DEMAND_COUNT_MARGIN standard deviations (plus as many
+    # demands) with negligible probability. A policy orders at most once per
+    # monthly evaluation, and each order draws one lag.
+    mean_demands = model.num_of_months / model.mean_inter_demand
+    max_demands = mean_demands + DEMAND_COUNT_MARGIN * (math.sqrt(mean_demands) + 1)
+    return 2 * math.ceil(max_demands) + 1, model.num_of_months
+
+def optimize_policies(input_file_path, policies, initial_reps=2, eta=2, workers=None):
+    # Successive halving: evaluate every surviving policy on more replications,
+    # keep the best 1/eta of them by mean total cost and multiply the number of
+    # replications by eta, until one policy is left. Replication r runs every
+    # policy on the same substreams (common random numbers), so the ranking
+    # compares policies rather than random-number noise.
+    if not policies:
+        raise ValueError("no policies to optimize over")
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    model = SPIS(input_file_path, None)
+    num_of_months = model.num_of_months
+    # Split the demand and lag streams into one substream per replication
+    # the last round needs
+    max_reps = halving_replications(len(policies), initial_reps, eta)
+    length = (PMMLCG.MODLUS - 1) // max_reps
+    if max(replication_draws(model)) > length:
+        raise ValueError(f"{max_reps} replications of {num_of_months} months would overlap substreams")
+    demand_streams = SubstreamFactory(1, length)
+    lag_streams = SubstreamFactory(LAG_STREAM, length)
+    survivors = list(range(len(policies)))
+    totals = [[0.0] * 4 for _ in policies]
+    num_of_reps = 0
+    target_reps = initial_reps
+    simulated_months = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            survivor_policies = [policies[i] for i in survivors]
+            seeds = [(demand_streams.seed(rep), lag_streams.seed(rep)) for rep in range(num_of_reps, target_reps)]
+            results = executor.map(simulate_policies, itertools.repeat(input_file_path),
+                                   itertools.repeat(survivor_policies), itertools.repeat(LAG_STREAM), seeds)
+            for replication in results:
+                for i, costs in zip(survivors, replication):
+                    totals[i] = [total + cost for total, cost in zip(totals[i], costs)]
+            simulated_months += len(survivors) * len(seeds) * num_of_months
+            num_of_reps = target_reps
             
+            if len(survivors) > 1:
+                survivors.sort(key=lambda i: totals[i][0])
+                survivors = survivors[:math.ceil(len(survivors) / eta)]
+            if len(survivors) == 1:
+                break
+            target_reps *= eta
+    
+    best = survivors[0]
+    return PolicySearchResult(policies[best], tuple(total / num_of_reps for total in totals[best]),
+                              num_of_reps, simulated_months, len(policies) * num_of_reps * num_of_months)
+
+def policy_grid(low, high, step):
+    # Every (s, S) with low <= s < S <= high on a grid of the given step
+    return [[smalls, bigs] for smalls in range(low, high + 1, step)
+            for bigs in range(smalls + step, high + 1, step)]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Single-Product Inventory System")
+    parser.add_argument("--sweep", action="store_true",
+                        help="evaluate the policies in parallel with common random numbers")
+    parser.add_argument("--grid", type=int, nargs=3, metavar=("LOW", "HIGH", "STEP"),
+                        help="sweep every s < S on this grid instead of the policies in in.txt")
+    parser.add_argument("--lockstep", action="store_true",
+                        help="sweep in one process, advancing all policies together as NumPy arrays")
+    parser.add_argument("--optimize", action="store_true",
+                        help="search the policies for the lowest average total cost by successive halving")
+    parser.add_argument("--initial-reps", type=int, default=2,
+                        help="replications per policy in the first optimizer round")
+    parser.add_argument("--eta", type=int, default=2,
+                        help="the optimizer keeps 1/eta of the policies each round")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes used by the sweep or optimizer (default: all cores)")
+    parser.add_argument("--profile", metavar="JSON_FILE",
+                        help="time the event loop, handlers and RNG of a sequential run and write a JSON summary")
+    parser.add_argument("--checkpoint-events", type=int, default=None,
+                        help="save a checkpoint of a sequential run every this many events")
+    parser.add_argument("--checkpoint-seconds", type=float, default=None,
+                        help="save a checkpoint of a sequential run every this many seconds")
+    parser.add_argument("--checkpoint-file", default=CHECKPOINT_FILE,
+                        help="where checkpoints are saved and resumed from")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the sequential run saved in the checkpoint file")
+    result_cache.add_cache_arguments(parser, "reuse the costs of policies simulated before with the same inputs and seeds")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     inventory_system = SPIS(INPUT_FILE_DIR, OUTPUT_FILE_DIR)
-    inventory_system.reportInputParams()
+    if args.grid:
+        inventory_system.policies = policy_grid(*args.grid)
+        inventory_system.num_of_policies = len(inventory_system.policies)
+    if not args.resume:
+        # A resumed run's output already starts with the input parameters
+        inventory_system.reportInputParams()
     policies = inventory_system.policies
-    for i in range(inventory_system.num_of_policies):
-        inventory_system.simulation(policies[i])
-    inventory_system.output_file.write(f"--------------------------------------------------------------------------------------------------")      
+    cache = result_cache.ResultCache.from_args(args) if args.cache else None
+    if args.optimize:
+        result = optimize_policies(INPUT_FILE_DIR, policies, args.initial_reps, args.eta, args.workers)
+        inventory_system.reportPolicy(result.policy, result.costs)
+        inventory_system.output_file.write(
+            f"Best of {len(policies)} policies over {result.num_of_replications} replications: "
+            f"{result.simulated_months} simulated months "
+            f"(exhaustive search: {result.brute_force_months})\n\n")
+    elif args.sweep or args.grid or args.lockstep:
+        if args.lockstep:
+            evaluate = simulate_policies_lockstep
+        else:
+            evaluate = lambda input_file_path, policies: sweep_policies(input_file_path, policies, args.workers)
+        if cache is not None:
+            sweep_costs = cached_policy_costs(cache, INPUT_FILE_DIR, policies, evaluate)
+        else:
+            sweep_costs = evaluate(INPUT_FILE_DIR, policies)
+        for policy, costs in zip(policies, sweep_costs):
+            inventory_system.reportPolicy(policy, costs)
+    else:
+        checkpointer = None
+        if args.checkpoint_events or args.checkpoint_seconds:
+            checkpointer = Checkpointer(args.checkpoint_file, args.checkpoint_events, args.checkpoint_seconds)
+        if args.resume:
+            inventory_system.restore_checkpoint(args.checkpoint_file)
+            if checkpointer is not None:
+                checkpointer.start(inventory_system.num_of_event)
+        inventory_system.cache = cache
+        profiler = Profiler() if args.profile else None
+        if profiler is not None:
+            profiler.instrument(inventory_system, PROFILED_METHODS)
+            profiler.instrument(inventory_system.prime_mod_generator, ["generate"], "rng.")
+            profiler.start()
+        first_policy = 0
+        if args.resume:
+            # Finish the policy that was interrupted, then go on with the rest
+            inventory_system.resume(checkpointer)
+            first_policy = inventory_system.policy_index + 1
+        for i in range(first_policy, inventory_system.num_of_policies):
+            inventory_system.policy_index = i
+            inventory_system.simulation(policies[i], checkpointer)
+        if profiler is not None:
+            profiler.stop()
+            profiler.write(args.profile, "SPIS", EVENT_HANDLERS)
+        if checkpointer is not None or args.resume:
+            remove_checkpoint(args.checkpoint_file)
+        if cache is not None:
+            inventory_system.store_results()
+            cache.flush()
+    inventory_system.reportEnd()
+    inventory_system.output_file.close()
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,299 @@
+import argparse
+import csv
+import math
+import numpy as np
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+
+# variates.py at the top of the repository is shared by the simulators
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import variates
+
+WORKBOOKS = ["./1805088_Project_1.xlsx", "./1805088_Project_2.xlsx"]
+# Trials simulated together; bounds memory to a (chunk x tasks) matrix
+CHUNK_SIZE = 1 << 16
+# Trials of the data tables in the workbooks
+DEFAULT_TRIALS = 1000
+
+# Duration models, one per workbook sheet: the triangular (a, m, b) by
+# inversion ("Triang"), and a + (b - a) * X with X = 1 - max(U1, U2) ("LT",
+# left-triangular on [a, b]) or X = max(U1, U2) ("RT", right-triangular)
+METHODS = {"triangular": "Triang", "left": "LT", "right": "RT"}
+# A task is critical in a trial when its total slack is below this fraction of
+# the project finish time (slack is found by subtraction, so it is rarely exactly 0)
+CRITICAL_TOLERANCE = 1e-9
+
+SPREADSHEET_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+                  "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships"}
+PACKAGE_RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def _column_index(reference):
+    # "C12" -> 2
+    index = 0
+    for letter in re.match(r"[A-Z]+", reference).group():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def read_xlsx_rows(path, sheet_name=None):
+    # Cell values (str, float or None) of one worksheet, row by row, read with
+    # the standard library only. Formula cells give their cached values.
+    with zipfile.ZipFile(path) as workbook:
+        strings = []
+        if "xl/sharedStrings.xml" in workbook.namelist():
+            for item in ET.fromstring(workbook.read("xl/sharedStrings.xml")).findall("m:si", SPREADSHEET_NS):
+                strings.append("".join(text.text or "" for text in item.iter(f"{{{SPREADSHEET_NS['m']}}}t")))
+        sheets = ET.fromstring(workbook.read("xl/workbook.xml")).find("m:sheets", SPREADSHEET_NS)
+        relationships = {relationship.get("Id"): relationship.get("Target")
+                         for relationship in ET.fromstring(workbook.read("xl/_rels/workbook.xml.rels"))
+                         if relationship.tag == f"{{{PACKAGE_RELATIONSHIPS_NS}}}Relationship"}
+        for sheet in sheets:
+            if sheet_name is None or sheet.get("name") == sheet_name:
+                target = relationships[sheet.get(f"{{{SPREADSHEET_NS['r']}}}id")].lstrip("/")
+                break
+        else:
+            raise KeyError(f"{path} has no sheet named {sheet_name!r}")
+        root = ET.fromstring(workbook.read(target if target.startswith("xl/") else "xl/" + target))
+
+    rows = []
+    for row in root.iter(f"{{{SPREADSHEET_NS['m']}}}row"):
+        values = {}
+        for cell in row.findall("m:c", SPREADSHEET_NS):
+            cell_type = cell.get("t")
+            if cell_type == "inlineStr":
+                value = "".join(text.text or "" for text in cell.iter(f"{{{SPREADSHEET_NS['m']}}}t"))
+            else:
+                value = cell.findtext("m:v", namespaces=SPREADSHEET_NS)
+                if value is None:
+                    continue
+                if cell_type == "s":
+                    value = strings[int(value)]
+                elif cell_type not in ("str", "e", "b"):
+                    value = float(value)
+            values[_column_index(cell.get("r"))] = value
+        row_values = [values.get(column) for column in range(max(values) + 1)] if values else []
+        # Row numbers may skip empty rows
+        rows.extend([] for _ in range(int(row.get("r")) - 1 - len(rows)))
+        rows.append(row_values)
+    return rows
+
+
+def _split_predecessors(text):
+    return [name for name in re.split(r"[\s,;]+", text or "") if name]
+
+
+class ProjectNetwork:
+    # Activity-on-node network with triangular (a, m, b) durations. The
+    # topological order and the predecessor and successor index arrays are
+    # computed once; every simulated trial reuses them.
+    def __init__(self, name, tasks, predecessors, a, m, b, deadline=None):
+        self.name = name
+        self.tasks = list(tasks)
+        self.a = np.asarray(a, dtype=float)
+        self.m = np.asarray(m, dtype=float)
+        self.b = np.asarray(b, dtype=float)
+        self.deadline = deadline
+        if not np.all((self.a <= self.m) & (self.m <= self.b)):
+            raise ValueError(f"{name}: every task needs a <= m <= b")
+
+        index = {task: i for i, task in enumerate(self.tasks)}
+        self.predecessors = []
+        for task, names in zip(self.tasks, predecessors):
+            unknown = [name for name in names if name not in index]
+            if unknown:
+                raise ValueError(f"{name}: task {task} follows unknown tasks {unknown}")
+            self.predecessors.append(np.array([index[name] for name in names], dtype=np.intp))
+        self.successors = [[] for _ in self.tasks]
+        for task, predecessor_indices in enumerate(self.predecessors):
+            for predecessor in predecessor_indices:
+                self.successors[predecessor].append(task)
+        self.successors = [np.array(successors, dtype=np.intp) for successors in self.successors]
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        # Kahn's algorithm, keeping the listed order among tasks that are ready together
+        remaining = [len(predecessors) for predecessors in self.predecessors]
+        ready = [task for task, count in enumerate(remaining) if count == 0]
+        order = []
+        while ready:
+            task = ready.pop(0)
+            order.append(task)
+            for successor in self.successors[task]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    ready.append(successor)
+        if len(order) != len(self.tasks):
+            raise ValueError(f"{self.name}: the precedence relation has a cycle")
+        return order
+
+    @classmethod
+    def from_xlsx(cls, path, sheet_name=METHODS["triangular"]):
+        # The task table (Task, Immediate Ancestors, a, m, b) and the deadline
+        # of a project workbook
+        rows = read_xlsx_rows(path, sheet_name)
+        name = next((row[0] for row in rows if row and isinstance(row[0], str)), path)
+        header = next(i for i, row in enumerate(rows) if row and row[0] == "Task")
+        tasks, predecessors, a, m, b = [], [], [], [], []
+        for row in rows[header + 1:]:
+            if not row or row[0] is None:
+                break
+            row = row + [None] * (5 - len(row))
+            tasks.append(str(row[0]))
+            predecessors.append(_split_predecessors(row[1]))
+            a.append(row[2])
+            m.append(row[3])
+            b.append(row[4])
+        deadline = None
+        for i, row in enumerate(rows):
+            if row and row[0] == "Deadline" and i + 1 < len(rows) and rows[i + 1]:
+                deadline = rows[i + 1][0]
+                break
+        return cls(name, tasks, predecessors, a, m, b, deadline)
+
+    @classmethod
+    def from_csv(cls, path, deadline=None, name=None):
+        # Columns task, predecessors, a, m, b with a header row; predecessors
+        # are separated by commas (quoted), semicolons or spaces
+        with open(path, "r", newline="") as file:
+            rows = [row for row in csv.DictReader(file)]
+        return cls(name or path, [row["task"] for row in rows],
+                   [_split_predecessors(row["predecessors"]) for row in rows],
+                   [float(row["a"]) for row in rows], [float(row["m"]) for row in rows],
+                   [float(row["b"]) for row in rows], deadline)
+
+    def sample_durations(self, rng, trials, method="triangular"):
+        # A (trials x tasks) matrix of durations, as each sheet draws them
+        if method == "triangular":
+            return variates.triangular(rng.random((trials, len(self.tasks))), self.a, self.m, self.b)
+        u = rng.random((2, trials, len(self.tasks))).max(axis=0)
+        if method == "left":
+            u = 1 - u
+        elif method != "right":
+            raise ValueError(f"Unknown duration method: {method}")
+        return variates.uniform(u, self.a, self.b)
+
+    def longest_paths(self, durations):
+        # Forward pass for the finish times, then a backward pass for the
+        # latest finish times without delaying the project. Each step is one
+        # vectorized operation over all trials.
+        finish = np.empty_like(durations)
+        for task in self.order:
+            predecessors = self.predecessors[task]
+            if len(predecessors):
+                finish[:, task] = finish[:, predecessors].max(axis=1) + durations[:, task]
+            else:
+                finish[:, task] = durations[:, task]
+        completion = finish.max(axis=1)
+        latest_finish = np.empty_like(durations)
+        for task in reversed(self.order):
+            successors = self.successors[task]
+            if len(successors):
+                latest_finish[:, task] = (latest_finish[:, successors] - durations[:, successors]).min(axis=1)
+            else:
+                latest_finish[:, task] = completion
+        critical = latest_finish - finish <= CRITICAL_TOLERANCE * completion[:, None]
+        return completion, critical
+
+    def simulate(self, trials, method="triangular", rng=None, chunk_size=CHUNK_SIZE, keep_times=False):
+        # Run `trials` trials in chunks and accumulate the statistics
+        rng = np.random.default_rng() if rng is None else rng
+        result = ProjectResult(self, method, trials)
+        times = [] if keep_times else None
+        for start in range(0, trials, chunk_size):
+            durations = self.sample_durations(rng, min(chunk_size, trials - start), method)
+            completion, critical = self.longest_paths(durations)
+            result.add(completion, critical)
+            if times is not None:
+                times.append(completion)
+        if times is not None:
+            result.completion_times = np.concatenate(times)
+        return result
+
+
+class ProjectResult:
+    def __init__(self, network, method, trials):
+        self.network = network
+        self.method = method
+        self.trials = trials
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        # Finishing strictly before the deadline counts as a success, as in the workbooks
+        self.successes = 0
+        self.critical_counts = np.zeros(len(network.tasks), dtype=np.int64)
+        self.completion_times = None
+
+    def add(self, completion, critical):
+        self.sum += completion.sum()
+        self.sum_squares += np.dot(completion, completion)
+        if self.network.deadline is not None:
+            self.successes += np.count_nonzero(completion < self.network.deadline)
+        self.critical_counts += critical.sum(axis=0)
+
+    def mean(self):
+        return self.sum / self.trials
+
+    def std(self):
+        return math.sqrt(max(self.sum_squares / self.trials - self.mean() ** 2, 0.0))
+
+    def success_rate(self):
+        return self.successes / self.trials if self.network.deadline is not None else None
+
+    def criticality_indices(self):
+        # Fraction of trials in which each task lies on a longest path
+        return dict(zip(self.network.tasks, self.critical_counts / self.trials))
+
+
+def format_result(result, elapsed):
+    network = result.network
+    lines = [f"{network.name}: {result.trials} trials, {result.method} durations ({METHODS[result.method]}), "
+             f"{elapsed:.2f} s",
+             f"Mean project finish time: {result.mean():.6f} (std {result.std():.6f})"]
+    if network.deadline is not None:
+        lines.append(f"Success rate (finish before {network.deadline:g}): {result.success_rate():.6f}")
+    lines.append("Criticality index:")
+    for task, index in result.criticality_indices().items():
+        lines.append(f"  {task:<6}{index:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Project Scheduling with Triangular Distributions")
+    parser.add_argument("projects", nargs="*", default=WORKBOOKS,
+                        help="project workbooks (.xlsx) or CSV files with task,predecessors,a,m,b columns")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS,
+                        help="Monte Carlo trials per project and method")
+    parser.add_argument("--method", choices=list(METHODS) + ["all"], default="all",
+                        help="duration model (default: all three sheets' models)")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="deadline for the success rate (default: the workbook's)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the random numbers")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="trials simulated at once")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    methods = list(METHODS) if args.method == "all" else [args.method]
+    for path in args.projects:
+        if path.lower().endswith(".csv"):
+            network = ProjectNetwork.from_csv(path, args.deadline)
+        else:
+            network = ProjectNetwork.from_xlsx(path)
+            if args.deadline is not None:
+                network.deadline = args.deadline
+        for method in methods:
+            start = time.perf_counter()
+            result = network.simulate(args.trials, method, rng, args.chunk_size)
+            print(format_result(result, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,27 @@
+import argparse
 import numpy as np
+import os
+import sys
+
+# variates.py and result_cache.py at the top of the repository are shared by the simulators
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import result_cache
+import variates
 
 OUTPUT_FILE_DIR = "./fission_output.txt"
+# Trials advanced together by the batched engine; bounds its memory use
+BATCH_SIZE = 10 ** 6
+# Largest neutron count the exact solver keeps; the mass beyond it is dropped
+EXACT_TAIL = 4096
+
+
+def _fft_multiply(a, b, max_terms):
+    # Coefficients of the product polynomial a * b up to degree max_terms - 1
+    size = len(a) + len(b) - 1
+    n = 1 << (size - 1).bit_length()
+    product = np.fft.irfft(np.fft.rfft(a, n) * np.fft.rfft(b, n), n)[:min(size, max_terms)]
+    # Round-off can leave tiny negative probabilities
+    return np.clip(product, 0.0, None)
 
 class NuclearChainReactionSimulator:
     def __init__(self, generations=10, trials=10000):
@@ -8,6 +29,8 @@ class NuclearChainReactionSimulator:
         self.trials = trials
         # Initializing probabilities
         self.probabilities = self._calculate_probabilities()
+        # Inversion gives the draws np.random.choice(p=self.probabilities) would
+        self.offspring = variates.DiscreteDistribution([0, 1, 2, 3], self.probabilities)
         # Initialize results matrix
         self.results = np.zeros((generations, 5), dtype=int)  # For storing counts of 0-4 neutrons
         self.output_file = open(OUTPUT_FILE_DIR, "a+")
@@ -19,13 +42,9 @@ class NuclearChainReactionSimulator:
         return [prob_0] + prob_1_to_3
 
     def _simulate_generation(self, current_neutrons):
-        # Simulate the neutron generation process
-        next_gen_neutrons = 0
-        for _ in range(current_neutrons):
-            # Choose how many neutrons are produced by this neutron
-            produced = np.random.choice([0, 1, 2, 3], p=self.probabilities)
-            next_gen_neutrons += produced
-        return next_gen_neutrons
+        # Simulate the neutron generation process: choose how many neutrons
+        # each neutron produces, from one uniform each
+        return int(self.offspring.sample(np.random.random_sample(current_neutrons)).sum())
 
     def run_simulation(self):
         for _ in range(self.trials):
@@ -35,6 +54,83 @@ class NuclearChainReactionSimulator:
                 # Record the result, ensuring it fits into the 0-4 range
                 self.results[gen, min(current_neutrons, 4)] += 1
 
+    def _offspring_cdfs(self, max_neutrons):
+        # CDF of the total offspring of n neutrons (the n-fold convolution of
+        # self.probabilities) for n = 0..max_neutrons. Shifting the CDF of n by n
+        # lays all of them out increasingly in one array, so a single
+        # searchsorted of n + u samples every population size at once.
+        pmf = np.array([1.0])
+        cdfs, starts = [], [0]
+        for n in range(max_neutrons + 1):
+            cdf = np.cumsum(pmf)
+            cdf[-1] = 1.0
+            cdfs.append(n + cdf)
+            starts.append(starts[-1] + len(cdf))
+            pmf = np.convolve(pmf, self.probabilities)
+        return np.concatenate(cdfs), np.array(starts[:-1])
+
+    def run_batched_simulation(self, rng=None, batch_size=BATCH_SIZE):
+        # Advance a whole batch of trials one generation per step, drawing each
+        # trial's total offspring with one uniform. Only the trials still alive
+        # are carried to the next generation.
+        rng = np.random.default_rng() if rng is None else rng
+        cdfs, starts = self._offspring_cdfs(0)
+        for start in range(0, self.trials, batch_size):
+            batch = min(batch_size, self.trials - start)
+            current_neutrons = np.ones(batch, dtype=np.int64)
+            for gen in range(self.generations):
+                u = rng.random(len(current_neutrons))
+                # One neutron: invert its offspring CDF directly, as the
+                # scalar engine does
+                next_gen_neutrons = self.offspring.sample(u).astype(np.int64)
+                # Several neutrons: invert the CDF of their summed offspring
+                several = np.flatnonzero(current_neutrons > 1)
+                if len(several):
+                    neutrons = current_neutrons[several]
+                    if neutrons.max() >= len(starts):
+                        cdfs, starts = self._offspring_cdfs(2 * neutrons.max())
+                    next_gen_neutrons[several] = np.searchsorted(cdfs, neutrons + u[several], side='right') - starts[neutrons]
+                
+                # Record the results, ensuring they fit into the 0-4 range
+                self.results[gen] += np.bincount(np.minimum(next_gen_neutrons, 4), minlength=5)
+                self.results[gen, 0] += batch - len(current_neutrons)
+                current_neutrons = next_gen_neutrons[next_gen_neutrons > 0]
+
+    def exact_generation_pmfs(self, max_neutrons=EXACT_TAIL):
+        # Exact distribution of the number of neutrons in each generation. With
+        # f the offspring PGF, generation g has PGF f(G_{g-1}), evaluated by
+        # Horner's rule with FFT polynomial products and truncated after
+        # max_neutrons, so at most the mass beyond that tail is lost.
+        pmfs = []
+        pmf = np.array([0.0, 1.0])  # Start with one neutron
+        for gen in range(self.generations):
+            composed = np.array([self.probabilities[-1]])
+            for coefficient in reversed(self.probabilities[:-1]):
+                composed = _fft_multiply(composed, pmf, max_neutrons + 1)
+                composed[0] += coefficient
+            pmf = composed
+            pmfs.append(pmf)
+        return pmfs
+
+    def exact_probabilities(self, max_neutrons=EXACT_TAIL):
+        # Exact counterpart of calculate_probabilities(): p[0..3] and p[4] = P(4 or more)
+        exact = np.zeros((self.generations, 5))
+        for gen, pmf in enumerate(self.exact_generation_pmfs(max_neutrons)):
+            head = pmf[:4]
+            exact[gen, :len(head)] = head
+            exact[gen, 4] = max(0.0, 1.0 - head.sum())
+        return exact
+
+    def validate(self, max_neutrons=EXACT_TAIL):
+        # Compare the Monte Carlo estimates with the exact probabilities. Returns
+        # both and the z-score of every estimate under its binomial standard error.
+        exact = self.exact_probabilities(max_neutrons)
+        estimated = self.calculate_probabilities()
+        standard_error = np.sqrt(exact * (1 - exact) / self.trials)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z_scores = np.where(standard_error > 0, (estimated - exact) / standard_error, 0.0)
+        return exact, estimated, z_scores
+
     def calculate_probabilities(self):
         # Convert counts to probabilities
         return self.results / self.trials
@@ -49,7 +145,41 @@ class NuclearChainReactionSimulator:
                 
             self.output_file.write(f"\n")
 
-# Create an instance of the simulator and run it
-simulator = NuclearChainReactionSimulator()
-simulator.run_simulation()
-simulator.display_results()
+    def cache_entry(self, seed, batch_size=BATCH_SIZE):
+        # Key and details for the result cache of run_batched_simulation()
+        # with np.random.default_rng(seed)
+        params = {"generations": self.generations, "trials": self.trials,
+                  "probabilities": self.probabilities, "batch_size": batch_size}
+        version = result_cache.code_version(__file__, variates.__file__)
+        return result_cache.result_key("fission", params, seed, version), ("fission", params, seed, version)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Nuclear Chain Reaction Simulation")
+    parser.add_argument("--generations", type=int, default=10,
+                        help="generations followed in every trial")
+    parser.add_argument("--trials", type=int, default=10000,
+                        help="number of trials")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the random numbers (default: fresh entropy)")
+    result_cache.add_cache_arguments(parser, "reuse the counts of an identical earlier run; needs --seed")
+    args = parser.parse_args()
+    if args.cache and args.seed is None:
+        parser.error("--cache needs --seed, since an unseeded run is never repeated")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Create an instance of the simulator and run it
+    simulator = NuclearChainReactionSimulator(args.generations, args.trials)
+    if args.cache:
+        with result_cache.ResultCache.from_args(args) as cache:
+            key, details = simulator.cache_entry(args.seed)
+            cached = cache.get(key)
+            if cached is not None:
+                simulator.results = cached["results"].astype(int)
+            else:
+                simulator.run_batched_simulation(np.random.default_rng(args.seed))
+                cache.put(key, *details, {"results": simulator.results})
+    else:
+        simulator.run_batched_simulation(np.random.default_rng(args.seed))
+    simulator.display_results()
@@ -1,5 +1,15 @@
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+# result_cache.py at the top of the repository is shared by the simulators
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import result_cache
+
+# Permutations drawn at once by the batched simulator; bounds its memory use
+BATCH_SIZE = 10000
 
 def simulate_secretary_problem(n, s, m, iterations=10000):
     successes = 0
@@ -25,35 +35,93 @@ def simulate_secretary_problem(n, s, m, iterations=10000):
                 successes += 1
     return successes / iterations
 
-# Population size
-n = 100
+def simulate_secretary_problem_batched(n, success_criteria, iterations=10000, rng=None, batch_size=BATCH_SIZE):
+    # Success rates for every criterion s and every sample size m = 0..n-1 from
+    # one shared batch of permutations. The first candidate after the sample
+    # who beats its best is the first left-to-right maximum at position >= m,
+    # so one reverse cumulative min over the record positions finds the
+    # selected candidate for all m at once.
+    rng = np.random.default_rng() if rng is None else rng
+    successes = {s: np.zeros(n) for s in success_criteria}
+    positions = np.arange(n)
+    for start in range(0, iterations, batch_size):
+        batch = min(batch_size, iterations - start)
+        # Generate a batch of random permutations of candidates, one per row
+        candidates = rng.permuted(np.tile(positions + 1, (batch, 1)), axis=1)
+        
+        # Positions of the candidates better than everyone before them
+        records = candidates == np.maximum.accumulate(candidates, axis=1)
+        record_positions = np.where(records, positions, n)
+        next_record = np.minimum.accumulate(record_positions[:, ::-1], axis=1)[:, ::-1]
+        
+        # If the best was among the first m, nobody is selected and the last
+        # candidate has to be taken
+        selected = np.where(next_record < n,
+                            np.take_along_axis(candidates, np.minimum(next_record, n - 1), axis=1),
+                            candidates[:, -1:])
+        for s in success_criteria:
+            successes[s] += (selected > n - s).sum(axis=0)
+    return {s: list(successes[s] / iterations) for s in success_criteria}
+
+def cached_secretary_problem(cache, n, success_criteria, iterations, seed, batch_size=BATCH_SIZE):
+    # simulate_secretary_problem_batched() with np.random.default_rng(seed),
+    # unless the cache holds the success rates of the same run
+    params = {"n": n, "success_criteria": list(success_criteria), "iterations": iterations,
+              "batch_size": batch_size}
+    version = result_cache.code_version(__file__)
+    key = result_cache.result_key("secretary", params, seed, version)
+    cached = cache.get(key)
+    if cached is not None:
+        return {s: cached["success_rates"][i].tolist() for i, s in enumerate(success_criteria)}
+    results = simulate_secretary_problem_batched(n, success_criteria, iterations,
+                                                 np.random.default_rng(seed), batch_size)
+    cache.put(key, "secretary", params, seed, version,
+              {"success_rates": [results[s] for s in success_criteria]})
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Secretary Problem")
+    parser.add_argument("--iterations", type=int, default=10000,
+                        help="permutations simulated")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the random numbers (default: fresh entropy)")
+    result_cache.add_cache_arguments(parser, "reuse the success rates of an identical earlier run; needs --seed")
+    args = parser.parse_args()
+    if args.cache and args.seed is None:
+        parser.error("--cache needs --seed, since an unseeded run is never repeated")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
 
-# Success criteria
-success_criteria = [1, 3, 5, 10]
+    # Population size
+    n = 100
 
-# Sample sizes to test
-sample_sizes = range(n)
+    # Success criteria
+    success_criteria = [1, 3, 5, 10]
 
-# Number of iterations for each simulation
-iterations = 10000
+    # Sample sizes to test
+    sample_sizes = range(n)
 
-# Store results
-results = {s: [] for s in success_criteria}
+    # Number of iterations for each simulation
+    iterations = args.iterations
 
-# Simulate for each success criteria and sample size
-for s in success_criteria:
-    for m in sample_sizes:
-        success_rate = simulate_secretary_problem(n, s, m, iterations)
-        results[s].append(success_rate)
+    # Simulate every success criteria and sample size on shared permutations
+    if args.cache:
+        with result_cache.ResultCache.from_args(args) as cache:
+            results = cached_secretary_problem(cache, n, success_criteria, iterations, args.seed)
+    else:
+        results = simulate_secretary_problem_batched(n, success_criteria, iterations,
+                                                     np.random.default_rng(args.seed))
 
-# Plotting
-plt.figure(figsize=(10, 6))
-for s in success_criteria:
-    plt.plot(sample_sizes, results[s], label=f'Top {s}')
+    # Plotting
+    plt.figure(figsize=(10, 6))
+    for s in success_criteria:
+        plt.plot(sample_sizes, results[s], label=f'Top {s}')
 
-plt.xlabel('Sample Size (m)')
-plt.ylabel('Success Rate')
-plt.title('Success Rate vs. Sample Size in Secretary Problem')
-plt.legend()
-plt.grid(True)
-plt.show()
+    plt.xlabel('Sample Size (m)')
+    plt.ylabel('Success Rate')
+    plt.title('Success Rate vs. Sample Size in Secretary Problem')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
@@ -0,0 +1 @@
+# Benchmarks of the simulators; run with `python -m benchmarks`
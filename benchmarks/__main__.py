@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+from benchmarks.cases import CASES
+from benchmarks.runner import (REGRESSION_THRESHOLD, compare, format_result, load_results,
+                               run_benchmarks, save_results)
+from benchmarks.sample_ios import check_sample_ios
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, "results.json")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+SEED = 12345
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmark the simulators and check them against the Sample IOs")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES),
+                        help="cases to run (default: all)")
+    parser.add_argument("--full", action="store_true",
+                        help="run the full scales, up to 10^7 customers or trials and 10^4 policies")
+    parser.add_argument("--scales", type=int, nargs="+", metavar="N",
+                        help="run every selected case at these scales instead")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs per case and scale; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=SEED,
+                        help="seed of every simulator's random numbers, so runs are comparable")
+    parser.add_argument("--output", default=RESULTS_FILE,
+                        help="JSON file the results are written to")
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help="JSON results to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="also write the results to the baseline file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative growth of wall time or peak RSS reported as a regression")
+    parser.add_argument("--skip-sample-ios", action="store_true",
+                        help="do not check the outputs against the bundled Sample IOs")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    failed = False
+
+    mismatches = None
+    if not args.skip_sample_ios:
+        mismatches = check_sample_ios()
+        for output, line_no, actual, expected in mismatches:
+            print(f"Sample IO mismatch in {output}, line {line_no}:\n  got:      {actual}\n  expected: {expected}")
+        print(f"Sample IOs: {'FAILED' if mismatches else 'OK'}")
+        failed |= bool(mismatches)
+
+    results = run_benchmarks(args.cases, args.full, args.repeat, args.seed, args.scales,
+                             progress=lambda result: print(format_result(result), flush=True))
+    save_results(args.output, results, mismatches)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        save_results(args.baseline, results, mismatches)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for case, scale, metric, reference, current in regressions:
+            print(f"Regression in {case} at {scale}: {metric} {reference:.4g} -> {current:.4g} "
+                  f"({current / reference - 1:+.0%})")
+        print(f"Baseline comparison: {'FAILED' if regressions else 'OK'} (threshold {args.threshold:.0%})")
+        failed |= bool(regressions)
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import itertools
+import os
+import numpy as np
+from benchmarks.simulators import INVENTORY_DIR, load, load_distribution
+
+# Stable queue (utilization 0.9), so the queue length stays bounded at every scale
+QUEUE_CONFIG = (1.0, 0.9)
+INVENTORY_INPUT = os.path.join(INVENTORY_DIR, "in.txt")
+# Secretary problem as in the assignment
+SECRETARY_N = 100
+SECRETARY_CRITERIA = [1, 3, 5, 10]
+# Gamma sample written for the distribution-fitting case
+FITTING_SHAPE = 2.0
+FITTING_SCALE = 3.0
+
+
+class Case:
+    # A benchmark: prepare(scale, seed) does the untimed setup and returns a
+    # callable that runs the simulator once and returns the number of events
+    # it processed, counted in `unit`
+    def __init__(self, name, unit, prepare, quick_scales, full_scales):
+        self.name = name
+        self.unit = unit
+        self.prepare = prepare
+        self.quick_scales = quick_scales
+        self.full_scales = full_scales
+
+    def scales(self, full=False):
+        return self.full_scales if full else self.quick_scales
+
+
+def prepare_queue(scale, seed):
+    simulator = load("queue_simulator")
+    model = simulator.SingleServerQueue(*QUEUE_CONFIG, scale)
+    if seed is not None:
+        model.rng.set_seed(seed, model.stream)
+
+    def run():
+        model.run()
+        return model.num_of_event
+    return run
+
+
+def prepare_inventory(scale, seed):
+    # `scale` policies of the (s, S) grid, evaluated with common random numbers
+    simulator = load("inventory_simulator")
+    policies = list(itertools.islice(itertools.cycle(simulator.policy_grid(0, 100, 1)), scale))
+    seeds = None if seed is None else (seed, seed)
+
+    def run():
+        inventory_system = simulator.SPIS(INVENTORY_INPUT, None, lag_stream=simulator.LAG_STREAM)
+        for policy in policies:
+            inventory_system.prime_mod_generator = simulator.PMMLCG(buffer_size=simulator.RNG_BUFFER_SIZE)
+            if seeds is not None:
+                inventory_system.prime_mod_generator.set_seed(seeds[0], 1)
+                inventory_system.prime_mod_generator.set_seed(seeds[1], simulator.LAG_STREAM)
+            inventory_system.simulation(policy)
+        return inventory_system.event_list.num_scheduled
+    return run
+
+
+def prepare_inventory_lockstep(scale, seed):
+    # The same policies and random numbers as prepare_inventory, all advanced together
+    simulator = load("inventory_simulator")
+    policies = list(itertools.islice(itertools.cycle(simulator.policy_grid(0, 100, 1)), scale))
+    seeds = None if seed is None else (seed, seed)
+
+    def run():
+        simulator.simulate_policies_lockstep(INVENTORY_INPUT, policies, simulator.LAG_STREAM, seeds)
+        return scale
+    return run
+
+
+def prepare_fission(scale, seed):
+    simulator = load("fission_simulator")
+    model = simulator.NuclearChainReactionSimulator(trials=scale)
+    # The results are not written out
+    model.output_file.close()
+
+    def run():
+        model.run_batched_simulation(np.random.default_rng(seed))
+        return model.trials * model.generations
+    return run
+
+
+def prepare_secretary(scale, seed):
+    simulator = load("secretary_simulator")
+
+    def run():
+        simulator.simulate_secretary_problem_batched(SECRETARY_N, SECRETARY_CRITERIA, scale,
+                                                     np.random.default_rng(seed))
+        return scale * SECRETARY_N
+    return run
+
+
+def prepare_fitting(scale, seed):
+    # Write a text sample like sample.txt, then time everything the tasks do
+    # with it: caching, one-pass summaries, both fits and the goodness-of-fit table
+    sample_cache = load_distribution("sample_cache")
+    streaming = load_distribution("streaming")
+    fitting = load_distribution("fitting")
+    goodness_of_fit = load_distribution("goodness_of_fit")
+    sample = np.random.default_rng(seed).gamma(FITTING_SHAPE, FITTING_SCALE, scale)
+    np.savetxt("sample.txt", sample)
+
+    def run():
+        data = sample_cache.load_sample("sample.txt", cache_dir=sample_cache.CACHE_DIR)
+        streaming.summarize_chunks(streaming.array_chunks(data))
+        statistics = fitting.SufficientStatistics.from_chunks(streaming.array_chunks(data))
+        fitting.fit_gamma(statistics=statistics)
+        fitting.fit_weibull(data, statistics)
+        goodness_of_fit.goodness_of_fit(data)
+        return len(data)
+    return run
+
+
+CASES = {case.name: case for case in [
+    Case("queue", "events", prepare_queue,
+         [10 ** 3, 10 ** 4, 10 ** 5], [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]),
+    Case("inventory", "events", prepare_inventory,
+         [10, 100], [10, 100, 1000, 10 ** 4]),
+    Case("lockstep", "policies", prepare_inventory_lockstep,
+         [10, 100, 1000], [10, 100, 1000, 10 ** 4, 10 ** 5]),
+    Case("fission", "trial generations", prepare_fission,
+         [10 ** 3, 10 ** 4, 10 ** 5], [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]),
+    Case("secretary", "candidates", prepare_secretary,
+         [10 ** 3, 10 ** 4, 10 ** 5], [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]),
+    Case("fitting", "observations", prepare_fitting,
+         [10 ** 3, 10 ** 4, 10 ** 5], [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]),
+]}
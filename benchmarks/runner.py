@@ -0,0 +1,136 @@
+from concurrent.futures import ProcessPoolExecutor
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from benchmarks.cases import CASES
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Wall time or peak RSS growing by more than this fraction of the baseline is a regression
+REGRESSION_THRESHOLD = 0.25
+# Timings shorter than this are too noisy to flag as regressions
+MIN_COMPARED_TIME = 0.05
+
+
+def peak_rss_mib():
+    # Peak resident set size of this process so far, or None where unavailable
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def run_case(name, scale, seed=None):
+    # One timed run, meant to execute in a fresh process so that its peak RSS
+    # is its own. It works in a temporary directory, since some simulators
+    # write files to the current one.
+    case = CASES[name]
+    with tempfile.TemporaryDirectory() as work_dir:
+        previous_dir = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            run = case.prepare(scale, seed)
+            gc.collect()
+            start = time.perf_counter()
+            events = run()
+            wall_time = time.perf_counter() - start
+        finally:
+            os.chdir(previous_dir)
+    return {
+        "case": name,
+        "scale": scale,
+        "unit": case.unit,
+        "events": events,
+        "wall_time": wall_time,
+        "events_per_second": events / wall_time if wall_time > 0 else None,
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def measure(name, scale, repeat=1, seed=None):
+    # Best wall time and largest peak RSS over `repeat` runs, each in its own
+    # freshly spawned interpreter
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            runs.append(executor.submit(run_case, name, scale, seed).result())
+    result = min(runs, key=lambda run: run["wall_time"])
+    peaks = [run["peak_rss_mib"] for run in runs if run["peak_rss_mib"] is not None]
+    result["peak_rss_mib"] = max(peaks) if peaks else None
+    result["repeat"] = repeat
+    return result
+
+
+def run_benchmarks(names, full=False, repeat=1, seed=None, scales=None, progress=None):
+    # Measure every case at each of its scales (or at `scales` when given)
+    results = []
+    for name in names:
+        for scale in scales or CASES[name].scales(full):
+            result = measure(name, scale, repeat, seed)
+            if progress is not None:
+                progress(result)
+            results.append(result)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def save_results(path, results, sample_io_mismatches=None):
+    report = {"environment": environment(), "results": results}
+    if sample_io_mismatches is not None:
+        report["sample_io_mismatches"] = [list(mismatch) for mismatch in sample_io_mismatches]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def load_results(path):
+    with open(path, "r") as file:
+        return json.load(file)["results"]
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    # Regressions against the baseline as (case, scale, metric, baseline value,
+    # current value). Only cases and scales present in both are compared.
+    baseline_by_key = {(result["case"], result["scale"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_by_key.get((result["case"], result["scale"]))
+        if reference is None:
+            continue
+        if (max(result["wall_time"], reference["wall_time"]) >= MIN_COMPARED_TIME
+                and result["wall_time"] > reference["wall_time"] * (1 + threshold)):
+            regressions.append((result["case"], result["scale"], "wall_time",
+                                reference["wall_time"], result["wall_time"]))
+        if (result["peak_rss_mib"] is not None and reference["peak_rss_mib"] is not None
+                and result["peak_rss_mib"] > reference["peak_rss_mib"] * (1 + threshold)):
+            regressions.append((result["case"], result["scale"], "peak_rss_mib",
+                                reference["peak_rss_mib"], result["peak_rss_mib"]))
+    return regressions
+
+
+def format_result(result):
+    rate = result["events_per_second"]
+    rss = result["peak_rss_mib"]
+    return (f"{result['case']:<10}{result['scale']:>10}{result['wall_time']:>12.4f} s"
+            f"{rate if rate is not None else float('nan'):>12.4g}/s"
+            f"{rss if rss is not None else float('nan'):>10.1f} MiB  ({result['unit']})")
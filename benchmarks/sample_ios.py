@@ -0,0 +1,97 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from benchmarks.simulators import INVENTORY_DIR, QUEUE_DIR, SCRIPTS
+
+SAMPLE_IOS = "Sample IOs"
+# The bundled outputs were produced by an earlier revision of the simulators and
+# differ from the current ones in the last printed digits (a few parts per
+# million in the queue statistics, one cent in the inventory costs). Integers
+# must match exactly; any other number matches when it is within one unit of
+# its last printed decimal place or within this relative tolerance.
+RELATIVE_TOLERANCE = 1e-5
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def numbers_match(actual, expected, relative_tolerance=RELATIVE_TOLERANCE):
+    decimals = len(expected.partition(".")[2])
+    if decimals == 0:
+        return actual == expected
+    tolerance = max(10.0 ** -decimals, relative_tolerance * abs(float(expected)))
+    return abs(float(actual) - float(expected)) <= tolerance * (1 + 1e-9)
+
+
+def compare_text(actual, expected, relative_tolerance=RELATIVE_TOLERANCE):
+    # First mismatch between two outputs as (line number, actual, expected), or
+    # None. Text and spacing must match exactly and numbers within tolerance;
+    # trailing blank lines are ignored.
+    actual_lines = actual.rstrip().splitlines()
+    expected_lines = expected.rstrip().splitlines()
+    for line_no in range(max(len(actual_lines), len(expected_lines))):
+        actual_line = actual_lines[line_no] if line_no < len(actual_lines) else ""
+        expected_line = expected_lines[line_no] if line_no < len(expected_lines) else ""
+        actual_numbers = NUMBER.findall(actual_line)
+        expected_numbers = NUMBER.findall(expected_line)
+        if (NUMBER.split(actual_line) != NUMBER.split(expected_line)
+                or len(actual_numbers) != len(expected_numbers)
+                or not all(numbers_match(a, e, relative_tolerance) for a, e in zip(actual_numbers, expected_numbers))):
+            return line_no + 1, actual_line, expected_line
+    return None
+
+
+def _sample_dirs(simulator_dir):
+    root = os.path.join(simulator_dir, SAMPLE_IOS)
+    return [os.path.join(root, name) for name in sorted(os.listdir(root))]
+
+
+def _run_script(script, work_dir):
+    completed = subprocess.run([sys.executable, script], cwd=work_dir, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{script} failed in {work_dir}:\n{completed.stderr}")
+
+
+def _check_outputs(name, work_dir, sample_dir, outputs):
+    # outputs maps the produced file (relative to work_dir) to the bundled one
+    mismatches = []
+    for produced, bundled in outputs.items():
+        with open(os.path.join(work_dir, produced), "r") as file:
+            actual = file.read()
+        with open(os.path.join(sample_dir, bundled), "r") as file:
+            expected = file.read()
+        mismatch = compare_text(actual, expected)
+        if mismatch is not None:
+            mismatches.append((f"{name}/{bundled}",) + mismatch)
+    return mismatches
+
+
+def check_queue():
+    # Run the queue on every bundled in.txt and compare results and event orders
+    mismatches = []
+    for sample_dir in _sample_dirs(QUEUE_DIR):
+        with tempfile.TemporaryDirectory() as work_dir:
+            os.makedirs(os.path.join(work_dir, "input_file"))
+            shutil.copy(os.path.join(sample_dir, "in.txt"), os.path.join(work_dir, "input_file", "in.txt"))
+            _run_script(SCRIPTS["queue_simulator"], work_dir)
+            mismatches += _check_outputs(
+                f"queue/{os.path.basename(sample_dir)}", work_dir, sample_dir,
+                {"output_files/results.txt": "results.txt", "output_files/event_orders.txt": "event_orders.txt"})
+    return mismatches
+
+
+def check_inventory():
+    mismatches = []
+    for sample_dir in _sample_dirs(INVENTORY_DIR):
+        with tempfile.TemporaryDirectory() as work_dir:
+            shutil.copy(os.path.join(sample_dir, "in.txt"), os.path.join(work_dir, "in.txt"))
+            _run_script(SCRIPTS["inventory_simulator"], work_dir)
+            mismatches += _check_outputs(f"inventory/{os.path.basename(sample_dir)}", work_dir, sample_dir,
+                                         {"out.txt": "out.txt"})
+    return mismatches
+
+
+def check_sample_ios():
+    # Every mismatch with the bundled Sample IOs as (output, line, actual, expected)
+    return check_queue() + check_inventory()
@@ -0,0 +1,42 @@
+import importlib
+import importlib.util
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUEUE_DIR = os.path.join(REPO_DIR, "Offline_1-Single_Server_Queueing_System")
+INVENTORY_DIR = os.path.join(REPO_DIR, "Offline_2-Single_Product_Inventory_System")
+MONTE_CARLO_DIR = os.path.join(REPO_DIR, "Offline_5-Monte_Carlo_Simulation")
+DISTRIBUTION_DIR = os.path.join(REPO_DIR, "Assignment-Probability_Distribution", "Codes")
+
+# The simulators are scripts named after the student id, so they are loaded by
+# path under these module names
+SCRIPTS = {
+    "queue_simulator": os.path.join(QUEUE_DIR, "1805088.py"),
+    "inventory_simulator": os.path.join(INVENTORY_DIR, "1805088.py"),
+    "fission_simulator": os.path.join(MONTE_CARLO_DIR, "1805088_problem_1.py"),
+    "secretary_simulator": os.path.join(MONTE_CARLO_DIR, "1805088_problem_2.py"),
+}
+
+
+def load(name):
+    # Import a simulator script once. It is registered in sys.modules so that
+    # its classes and functions can be pickled for process pools.
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS[name])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def load_distribution(name):
+    # The distribution-fitting modules import each other by plain name
+    if DISTRIBUTION_DIR not in sys.path:
+        sys.path.insert(0, DISTRIBUTION_DIR)
+    return importlib.import_module(name)
@@ -0,0 +1,58 @@
+import math
+import os
+import time
+
+# Checkpoint scheduling and files shared by the discrete-event simulators.
+# Each simulator defines its own checkpoint format.
+
+# Events between two looks at the clock when checkpointing every so many seconds
+CHECKPOINT_CHECK_EVENTS = 4096
+
+
+class Checkpointer:
+    # Decides when an event loop saves a checkpoint: every `every_events`
+    # events and/or every `every_seconds` seconds. The loop only asks due()
+    # once every check_interval events, so the clock is not read per event.
+    def __init__(self, path, every_events=None, every_seconds=None):
+        if not every_events and not every_seconds:
+            raise ValueError("a checkpoint interval in events or seconds is required")
+        self.path = path
+        self.every_events = every_events
+        self.every_seconds = every_seconds
+        self.check_interval = min(every_events or CHECKPOINT_CHECK_EVENTS,
+                                  CHECKPOINT_CHECK_EVENTS if every_seconds else math.inf)
+        self.num_saved = 0
+        self.start(0)
+
+    def start(self, num_of_event):
+        self.last_event = num_of_event
+        self.last_time = time.monotonic()
+
+    def due(self, num_of_event):
+        if self.every_events and num_of_event - self.last_event >= self.every_events:
+            return True
+        return bool(self.every_seconds) and time.monotonic() - self.last_time >= self.every_seconds
+
+    def saved(self, num_of_event):
+        self.num_saved += 1
+        self.start(num_of_event)
+
+    def remove(self):
+        remove_checkpoint(self.path)
+
+
+def write_atomically(path, data):
+    # Replace `path` only once `data` is safely on disk, so a crash while
+    # checkpointing leaves the previous checkpoint intact
+    with open(path + ".tmp", "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def remove_checkpoint(path):
+    # A finished run leaves nothing to resume, whether it saved checkpoints
+    # itself or was resumed from one
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,178 @@
+import bisect
+import heapq
+import math
+
+# Future event lists shared by the discrete-event simulators. Entries are
+# [time, rank, sequence number, event type, data] lists, so they order by
+# time, then rank, then scheduling order, and double as cancel() handles.
+
+
+class FutureEventList:
+    # Binary-heap future event list. Events come out in time order; ties go to
+    # the lower rank (the event type unless `priority` maps it), then to the
+    # event scheduled first. cancel() only marks an entry, which pop() skips.
+    def __init__(self, priority=None):
+        self.priority = priority or {}
+        self.heap = []
+        self.num_scheduled = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def schedule(self, time, event_type, data=None):
+        # Returns a handle that can be passed to cancel()
+        entry = [time, self.priority.get(event_type, event_type), self.num_scheduled, event_type, data]
+        self.num_scheduled += 1
+        self.size += 1
+        heapq.heappush(self.heap, entry)
+        return entry
+
+    def cancel(self, entry):
+        if entry[3] is not None:
+            entry[3] = None
+            self.size -= 1
+
+    def _discard_cancelled(self):
+        heap = self.heap
+        while heap and heap[0][3] is None:
+            heapq.heappop(heap)
+
+    def peek_time(self):
+        self._discard_cancelled()
+        return self.heap[0][0] if self.heap else math.inf
+
+    def pop(self):
+        # Remove the next event and return (time, event_type, data)
+        heap = self.heap
+        while heap:
+            entry = heapq.heappop(heap)
+            event_type = entry[3]
+            if event_type is not None:
+                # A popped event can no longer be cancelled
+                entry[3] = None
+                self.size -= 1
+                return entry[0], event_type, entry[4]
+        raise IndexError("pop from an empty FutureEventList")
+
+    def clear(self):
+        self.heap.clear()
+        self.size = 0
+
+    def snapshot(self):
+        # The pending events as (time, rank, sequence number, event type, data)
+        return sorted(tuple(entry[:5]) for entry in self.heap if entry[3] is not None)
+
+    def restore(self, entries, num_scheduled):
+        # Replace the contents with a snapshot() and return the new entries, the
+        # handles for cancel(). Sequence numbers continue from num_scheduled, so
+        # ties still break as they would have.
+        self.heap = [list(entry) for entry in entries]
+        handles = list(self.heap)
+        heapq.heapify(self.heap)
+        self.size = len(self.heap)
+        self.num_scheduled = num_scheduled
+        return handles
+
+
+class CalendarQueue(FutureEventList):
+    # Brown's calendar queue: events hash into `num_buckets` sorted buckets of
+    # `width` time units each, giving O(1) average schedule/pop for large event
+    # counts. Each entry remembers its virtual bucket floor(time / width), so
+    # bucket boundaries never depend on accumulated floating-point sums.
+    def __init__(self, priority=None, num_buckets=2, width=1.0):
+        self.priority = priority or {}
+        self.num_scheduled = 0
+        self._build(num_buckets, width, [])
+
+    def _build(self, num_buckets, width, entries):
+        self.num_buckets = num_buckets
+        self.width = width
+        self.buckets = [[] for _ in range(num_buckets)]
+        self.size = 0
+        self.current = min((int(entry[0] / width) for entry in entries), default=0)
+        for entry in entries:
+            self._insert(entry)
+
+    def _insert(self, entry):
+        virtual_bucket = int(entry[0] / self.width)
+        if len(entry) == 5:
+            entry.append(virtual_bucket)
+        else:
+            entry[5] = virtual_bucket
+        bisect.insort(self.buckets[virtual_bucket % self.num_buckets], entry)
+        self.size += 1
+        # The scan position never passes an event still waiting in the list
+        if virtual_bucket < self.current:
+            self.current = virtual_bucket
+
+    def _live_entries(self):
+        return [entry for bucket in self.buckets for entry in bucket if entry[3] is not None]
+
+    def _resize(self, num_buckets):
+        entries = self._live_entries()
+        # Bucket width of about three times the mean gap between the earliest events
+        sample = sorted(entry[0] for entry in heapq.nsmallest(25, entries))
+        gaps = [later - earlier for earlier, later in zip(sample, sample[1:]) if later > earlier]
+        width = 3.0 * sum(gaps) / len(gaps) if gaps else self.width
+        self._build(num_buckets, width, entries)
+
+    def schedule(self, time, event_type, data=None):
+        entry = [time, self.priority.get(event_type, event_type), self.num_scheduled, event_type, data]
+        self.num_scheduled += 1
+        self._insert(entry)
+        if self.size > 2 * self.num_buckets:
+            self._resize(2 * self.num_buckets)
+        return entry
+
+    def _find_next(self):
+        # Bucket holding the next live event, or None if there is none
+        buckets = self.buckets
+        for _ in range(self.num_buckets):
+            bucket = buckets[self.current % self.num_buckets]
+            while bucket and bucket[0][3] is None:
+                bucket.pop(0)
+            if bucket and bucket[0][5] <= self.current:
+                return bucket
+            self.current += 1
+        # A whole year without an event: jump straight to the earliest one
+        heads = []
+        for bucket in buckets:
+            while bucket and bucket[0][3] is None:
+                bucket.pop(0)
+            if bucket:
+                heads.append(bucket[0])
+        if not heads:
+            return None
+        self.current = min(heads)[5]
+        return buckets[self.current % self.num_buckets]
+
+    def peek_time(self):
+        bucket = self._find_next()
+        return bucket[0][0] if bucket is not None else math.inf
+
+    def pop(self):
+        bucket = self._find_next()
+        if bucket is None:
+            raise IndexError("pop from an empty CalendarQueue")
+        entry = bucket.pop(0)
+        time, _, _, event_type, data, _ = entry
+        entry[3] = None
+        self.size -= 1
+        if self.num_buckets > 2 and self.size < self.num_buckets // 2:
+            self._resize(self.num_buckets // 2)
+        return time, event_type, data
+
+    def clear(self):
+        self._build(2, 1.0, [])
+
+    def snapshot(self):
+        return sorted(tuple(entry[:5]) for entry in self._live_entries())
+
+    def restore(self, entries, num_scheduled):
+        handles = [list(entry) for entry in entries]
+        self._build(2, 1.0, handles)
+        while self.size > 2 * self.num_buckets:
+            self._resize(2 * self.num_buckets)
+        self.num_scheduled = num_scheduled
+        return handles
@@ -0,0 +1,147 @@
+import numpy as np
+
+# Prime modulus multiplicative linear congruential generator shared by the
+# simulators: 100 streams, block generation, jump-ahead and substreams.
+
+# Draws reserved for each substream handed out by SubstreamFactory
+SUBSTREAM_LENGTH = 2 ** 24
+
+
+class PMMLCG:
+    MODLUS = 2147483647
+    MULT1 = 24112
+    MULT2 = 26143
+    # generate() applies MULT1 and then MULT2, i.e. one step multiplies by their product
+    MULT = MULT1 * MULT2 % MODLUS
+
+    def __init__(self, buffer_size=0):
+        self.zrng = [
+            1, 1973272912, 281629770, 20006270, 1280689831, 2096730329, 1933576050,
+            913566091, 246780520, 1363774876, 604901985, 1511192140, 1259851944,
+            824064364, 150493284, 242708531, 75253171, 1964472944, 1202299975,
+            233217322, 1911216000, 726370533, 403498145, 993232223, 1103205531,
+            762430696, 1922803170, 1385516923, 76271663, 413682397, 726466604,
+            336157058, 1432650381, 1120463904, 595778810, 877722890, 1046574445,
+            68911991, 2088367019, 748545416, 622401386, 2122378830, 640690903,
+            1774806513, 2132545692, 2079249579, 78130110, 852776735, 1187867272,
+            1351423507, 1645973084, 1997049139, 922510944, 2045512870, 898585771,
+            243649545, 1004818771, 773686062, 403188473, 372279877, 1901633463,
+            498067494, 2087759558, 493157915, 597104727, 1530940798, 1814496276,
+            536444882, 1663153658, 855503735, 67784357, 1432404475, 619691088,
+            119025595, 880802310, 176192644, 1116780070, 277854671, 1366580350,
+            1142483975, 2026948561, 1053920743, 786262391, 1792203830, 1494667770,
+            1923011392, 1433700034, 1244184613, 1147297105, 539712780, 1545929719,
+            190641742, 1645390429, 264907697, 620389253, 1502074852, 927711160,
+            364849192, 2049576050, 638580085, 547070247
+        ]
+        # With buffer_size > 0, generate() serves uniforms from per-stream blocks
+        # produced by generate_block() instead of stepping the recurrence each call
+        self.buffer_size = buffer_size
+        self._buffers = {}
+        self._powers = {}
+
+    def generate(self, stream):
+        if self.buffer_size:
+            return self._generate_buffered(stream)
+        zi = self.zrng[stream]
+        lowprd = (zi & 65535) * self.MULT1
+        hi31 = (zi >> 16) * self.MULT1 + (lowprd >> 16)
+        zi = ((lowprd & 65535) - self.MODLUS) + ((hi31 & 32767) << 16) + (hi31 >> 15)
+        if zi < 0:
+            zi += self.MODLUS
+        lowprd = (zi & 65535) * self.MULT2
+        hi31 = (zi >> 16) * self.MULT2 + (lowprd >> 16)
+        zi = ((lowprd & 65535) - self.MODLUS) + ((hi31 & 32767) << 16) + (hi31 >> 15)
+        if zi < 0:
+            zi += self.MODLUS
+        self.zrng[stream] = zi
+        return (zi >> 7 | 1) / 16777216.0
+
+    def _multiplier_powers(self, n):
+        # MULT^1 .. MULT^n (mod MODLUS), built by doubling and cached per block size.
+        # Every factor is below 2^31, so the products fit in int64.
+        powers = self._powers.get(n)
+        if powers is None:
+            powers = np.empty(n, dtype=np.int64)
+            powers[0] = self.MULT
+            filled = 1
+            while filled < n:
+                step = min(filled, n - filled)
+                powers[filled:filled + step] = powers[:step] * powers[filled - 1] % self.MODLUS
+                filled += step
+            self._powers[n] = powers
+        return powers
+
+    def _next_seeds(self, stream, n):
+        # The next n values of zrng[stream], leaving the stream at the last one
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        seeds = self.get_seed(stream) * self._multiplier_powers(n) % self.MODLUS
+        self.set_seed(int(seeds[-1]), stream)
+        return seeds
+
+    def generate_block(self, stream, n):
+        # Return the next n uniforms of the stream as a NumPy array, bit-identical
+        # to n calls of generate(stream)
+        seeds = self._next_seeds(stream, n)
+        return ((seeds >> 7) | 1) / 16777216.0
+
+    def _generate_buffered(self, stream):
+        buffer = self._buffers.get(stream)
+        if buffer is None or buffer[2] == self.buffer_size:
+            seeds = self._next_seeds(stream, self.buffer_size)
+            # Python floats index much faster than NumPy scalars
+            buffer = [(((seeds >> 7) | 1) / 16777216.0).tolist(), seeds, 0]
+            self._buffers[stream] = buffer
+        u = buffer[0][buffer[2]]
+        buffer[2] += 1
+        return u
+
+    def jump_ahead(self, stream, steps):
+        # Move the stream forward by `steps` draws in O(log steps) time
+        multiplier = pow(self.MULT1, steps, self.MODLUS) * pow(self.MULT2, steps, self.MODLUS)
+        self.set_seed(self.get_seed(stream) * multiplier % self.MODLUS, stream)
+
+    def set_seed(self, zset, stream):
+        self._buffers.pop(stream, None)
+        self.zrng[stream] = zset
+
+    def get_seed(self, stream):
+        # A buffered stream has already advanced zrng past the values still
+        # waiting in its buffer, so report the seed of the last value handed out
+        buffer = self._buffers.get(stream)
+        if buffer is not None:
+            return int(buffer[1][buffer[2] - 1])
+        return self.zrng[stream]
+
+
+class SubstreamFactory:
+    # Hands out disjoint segments of one PMMLCG stream. Substream i starts
+    # i * length draws after the base seed, so substreams never overlap as long
+    # as no worker draws more than `length` values.
+    def __init__(self, stream=1, length=SUBSTREAM_LENGTH, buffer_size=0, seed=None):
+        self.stream = stream
+        self.length = length
+        self.buffer_size = buffer_size
+        self.base_seed = PMMLCG().get_seed(stream) if seed is None else seed
+        self.max_substreams = (PMMLCG.MODLUS - 1) // length
+        self.num_issued = 0
+
+    def seed(self, index):
+        # Starting seed of substream `index`, cheap to send to another process
+        if not 0 <= index < self.max_substreams:
+            raise ValueError(f"Substream {index} is outside 0..{self.max_substreams - 1}")
+        generator = PMMLCG()
+        generator.set_seed(self.base_seed, self.stream)
+        generator.jump_ahead(self.stream, index * self.length)
+        return generator.get_seed(self.stream)
+
+    def substream(self, index):
+        generator = PMMLCG(buffer_size=self.buffer_size)
+        generator.set_seed(self.seed(index), self.stream)
+        return generator
+
+    def next(self):
+        generator = self.substream(self.num_issued)
+        self.num_issued += 1
+        return generator
@@ -0,0 +1,63 @@
+import json
+import time
+
+# Opt-in profiling shared by the discrete-event simulators' --profile option
+
+
+class Profiler:
+    # Opt-in instrumentation. Methods are only wrapped with timers when a
+    # Profiler is attached, so uninstrumented runs pay nothing. Times are
+    # inclusive: a handler's time contains the RNG draws it makes.
+    def __init__(self):
+        self.calls = {}
+        self.cumulative_time = {}
+        self.wall_time = 0.0
+        self.run_start = None
+
+    def timed(self, name, function):
+        calls, cumulative_time = self.calls, self.cumulative_time
+        calls.setdefault(name, 0)
+        cumulative_time.setdefault(name, 0.0)
+        clock = time.perf_counter
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                cumulative_time[name] += clock() - start
+                calls[name] += 1
+        return wrapper
+
+    def instrument(self, target, names, prefix=""):
+        # Wrap methods of an instance in place
+        for name in names:
+            setattr(target, name, self.timed(prefix + name, getattr(target, name)))
+        return target
+
+    def instrument_class(self, cls, names):
+        # A subclass with wrapped methods, for classes whose instances use __slots__
+        return type(cls.__name__, (cls,), {name: self.timed(name, getattr(cls, name)) for name in names})
+
+    def start(self):
+        self.run_start = time.perf_counter()
+
+    def stop(self):
+        self.wall_time += time.perf_counter() - self.run_start
+
+    def summary(self, model, event_handlers):
+        # event_handlers maps each event type to the method that handles it
+        events = self.calls.get("timing", 0)
+        return {
+            "model": model,
+            "wall_time": self.wall_time,
+            "events": events,
+            "events_per_second": events / self.wall_time if self.wall_time > 0 else 0.0,
+            "event_counts": {event: self.calls.get(handler, 0) for event, handler in event_handlers.items()},
+            "rng_draws": self.calls.get("rng.generate", 0),
+            "calls": dict(self.calls),
+            "cumulative_time": dict(self.cumulative_time),
+        }
+
+    def write(self, path, model, event_handlers):
+        with open(path, "w") as profile:
+            json.dump(self.summary(model, event_handlers), profile, indent=4)
@@ -0,0 +1,309 @@
+import functools
+import hashlib
+import json
+import os
+import struct
+import time
+import numpy as np
+
+# Results of simulation runs live here. Runs stored together, e.g. the points
+# of a sweep, share one segment file with a row per run. The index keeps the
+# model, code version, parameters and seeds of each segment column by column,
+# and maps each run's key (see result_key) to its segment and row.
+CACHE_DIR = ".result_cache"
+INDEX_FILE = "index.json"
+# Once the segments and the index take more than this, the least recently
+# used runs are evicted
+MAX_BYTES = 64 << 20
+
+# Segment file: magic, version and the length of a JSON directory of the
+# columns as [name, dtype, shape], then the directory and the raw
+# little-endian values of each column in turn, rows first
+MAGIC = b"RSLT"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xI")
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(*paths):
+    # SHA-256 of the source files a model runs, so that changing the code
+    # retires its cached results instead of serving stale ones. Hashed once
+    # per process.
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def result_key(model, params, seed, version):
+    # Hash of a run: the model name, its parameters, the RNG seed or substream
+    # and the code version. params and seed must be JSON values; the JSON is
+    # canonical, so equal configurations hash equally whatever the key order.
+    text = json.dumps({"model": model, "params": params, "seed": seed, "version": version},
+                      sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def write_result(path, columns):
+    # Write named arrays (or scalars) as a segment file
+    arrays = {name: np.asarray(value) for name, value in columns.items()}
+    directory = json.dumps([[name, array.dtype.newbyteorder("<").str, list(array.shape)]
+                            for name, array in arrays.items()]).encode()
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(directory)))
+        file.write(directory)
+        for array in arrays.values():
+            file.write(array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes())
+
+
+def read_result(path):
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, directory_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a result segment")
+    offset = HEADER.size + directory_size
+    columns = {}
+    for name, dtype, shape in json.loads(data[HEADER.size:offset]):
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        columns[name] = np.frombuffer(data, dtype, count, offset).reshape(shape)
+        offset += count * dtype.itemsize
+    return columns
+
+
+def add_cache_arguments(parser, help):
+    # The --cache option of a simulator script, with `help` saying what it
+    # reuses, and where and how much the cache keeps. ResultCache.from_args()
+    # opens the cache they describe.
+    parser.add_argument("--cache", action="store_true", help=help)
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="directory of the result cache")
+    parser.add_argument("--cache-size", type=int, default=MAX_BYTES >> 20, metavar="MIB",
+                        help="megabytes of results kept before the least recently used are evicted")
+
+
+class ResultCache:
+    # On-disk store of simulation results keyed by result_key(). The index is
+    # read once and written back by flush() (or on leaving a with block), so a
+    # sweep pays one index write however many points it looks up. Whenever
+    # the segments and the index exceed max_bytes, runs are evicted least
+    # recently used first, and a segment is deleted once none of its runs is
+    # left.
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._read_index()
+        # Size of the index file as last read or written
+        try:
+            self._index_bytes = os.path.getsize(self._index_path())
+        except OSError:
+            self._index_bytes = 0
+        # Segments read so far, by name
+        self._loaded = {}
+        self._changed = set()
+        self._removed = set()
+        self._removed_segments = set()
+
+    @classmethod
+    def from_args(cls, args):
+        # The cache of the options add_cache_arguments() added
+        return cls(args.cache_dir, args.cache_size << 20)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def _read_index(self):
+        # "segments" maps a segment to its size, model, version and the
+        # parameters and seed of each row; "entries" maps a key to
+        # [segment, row, last use]
+        try:
+            with open(self._index_path(), "r") as index:
+                return json.load(index)
+        except (OSError, ValueError):
+            return {"segments": {}, "entries": {}}
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _path(self, segment):
+        return os.path.join(self.cache_dir, f"{segment}.rslt")
+
+    def _segment(self, segment):
+        columns = self._loaded.get(segment)
+        if columns is None:
+            columns = read_result(self._path(segment))
+            self._loaded[segment] = columns
+        return columns
+
+    def get(self, key):
+        # The columns stored under key, or None on a miss
+        entry = self.index["entries"].get(key)
+        if entry is None:
+            return None
+        segment, row, _ = entry
+        try:
+            columns = self._segment(segment)
+        except (OSError, ValueError):
+            # Deleted or damaged behind the index's back
+            self._remove_segment(segment)
+            return None
+        entry[2] = time.time_ns()
+        self._changed.add(key)
+        return {name: column[row] for name, column in columns.items()}
+
+    def put(self, key, model, params, seed, version, columns):
+        # Store one run's results, given as named arrays or scalars
+        self.put_many(model, version, [(key, params, seed, columns)])
+
+    def put_many(self, model, version, runs):
+        # Store the results of several runs of a model, as (key, params, seed,
+        # columns) with the same column names and shapes, in one segment
+        if not runs:
+            return
+        entries = self.index["entries"]
+        keys = [key for key, _, _, _ in runs]
+        segment = hashlib.sha256("".join(keys).encode()).hexdigest()[:16]
+        path = self._path(segment)
+        stacked = {name: np.stack([np.asarray(columns[name]) for _, _, _, columns in runs])
+                   for name in runs[0][3]}
+        # Write under a temporary name so an interrupted run leaves no partial file
+        write_result(path + ".tmp", stacked)
+        os.replace(path + ".tmp", path)
+        self._loaded.pop(segment, None)
+        names = dict.fromkeys(name for _, params, _, _ in runs for name in params)
+        self.index["segments"][segment] = {
+            "size": os.path.getsize(path), "model": model, "version": version,
+            "params": {name: [params.get(name) for _, params, _, _ in runs] for name in names},
+            "seed": [seed for _, _, seed, _ in runs]}
+        self._removed_segments.discard(segment)
+        replaced = {entries[key][0] for key in keys if key in entries} - {segment}
+        now = time.time_ns()
+        for row, key in enumerate(keys):
+            entries[key] = [segment, row, now]
+            self._changed.add(key)
+            self._removed.discard(key)
+        # Segments whose runs were all stored again are no longer needed
+        for segment in replaced - {entry[0] for entry in entries.values()}:
+            self._remove_segment(segment)
+        if self.size() > self.max_bytes:
+            self.evict()
+
+    def _remove_segment(self, segment):
+        # Delete a segment with all its runs
+        entries = self.index["entries"]
+        for key in [key for key, entry in entries.items() if entry[0] == segment]:
+            del entries[key]
+            self._changed.discard(key)
+            self._removed.add(key)
+        self.index["segments"].pop(segment, None)
+        self._loaded.pop(segment, None)
+        self._removed_segments.add(segment)
+        try:
+            os.remove(self._path(segment))
+        except FileNotFoundError:
+            pass
+
+    def size(self):
+        # Bytes on disk: the segments and the index as last written
+        return self._index_bytes + sum(segment["size"] for segment in self.index["segments"].values())
+
+    def evict(self, max_bytes=None):
+        # Drop least recently used runs until the cache fits in max_bytes,
+        # counting the index at the size it will be written at: every run and
+        # segment dropped takes its JSON, and the separator before it, along
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.index["entries"]
+        live = {}
+        for segment, _, _ in entries.values():
+            live[segment] = live.get(segment, 0) + 1
+        for segment in [segment for segment in self.index["segments"] if segment not in live]:
+            self._remove_segment(segment)
+        segments = self.index["segments"]
+        total = len(json.dumps(self.index)) + sum(info["size"] for info in segments.values())
+        for key in sorted(entries, key=lambda key: entries[key][2]):
+            if total <= max_bytes:
+                break
+            total -= len(json.dumps({key: entries[key]}))
+            segment = entries.pop(key)[0]
+            self._changed.discard(key)
+            self._removed.add(key)
+            live[segment] -= 1
+            if live[segment] == 0:
+                total -= segments[segment]["size"] + len(json.dumps({segment: segments[segment]}))
+                self._remove_segment(segment)
+
+    def query(self, model, version=None):
+        # The cached runs of a model as columns, one row per run: "key", "seed",
+        # every parameter and every result column, e.g. to plot a sweep.
+        # Only runs of the given code version when one is given.
+        rows_by_segment = {}
+        for key, (segment, row, _) in self.index["entries"].items():
+            rows_by_segment.setdefault(segment, []).append((row, key))
+        parts = []
+        for segment, info in self.index["segments"].items():
+            if info["model"] != model or (version is not None and info["version"] != version):
+                continue
+            try:
+                columns = self._segment(segment)
+            except (OSError, ValueError):
+                continue
+            rows = sorted(rows_by_segment.get(segment, []))
+            if not rows:
+                continue
+            indices = [row for row, _ in rows]
+            part = {"key": [key for _, key in rows], "seed": [info["seed"][row] for row in indices]}
+            part.update((name, [values[row] for row in indices]) for name, values in info["params"].items())
+            part.update((name, list(column[indices])) for name, column in columns.items())
+            parts.append(part)
+        table = {}
+        for name in dict.fromkeys(name for part in parts for name in part):
+            values = [value for part in parts for value in part.get(name, [None] * len(part["key"]))]
+            try:
+                table[name] = np.array(values)
+            except ValueError:
+                # Ragged values stay a list
+                table[name] = values
+        return table
+
+    def flush(self):
+        # Merge this cache's changes into the index on disk, so that runs
+        # sharing the directory keep each other's results
+        if self.size() > self.max_bytes:
+            self.evict()
+        if not self._changed and not self._removed and not self._removed_segments:
+            return
+        index = self._read_index()
+        for key in self._removed:
+            index["entries"].pop(key, None)
+        for segment in self._removed_segments:
+            index["segments"].pop(segment, None)
+        for key in self._changed:
+            entry = self.index["entries"][key]
+            index["entries"][key] = entry
+            index["segments"][entry[0]] = self.index["segments"][entry[0]]
+        self.index = index
+        self._changed.clear()
+        self._removed.clear()
+        self._removed_segments.clear()
+        self._write_index()
+        if self.size() > self.max_bytes:
+            # The merged index grew past the budget
+            self.evict()
+            self._changed.clear()
+            self._removed.clear()
+            self._removed_segments.clear()
+            self._write_index()
+
+    def _write_index(self):
+        path = self._index_path()
+        text = json.dumps(self.index)
+        with open(path + ".tmp", "w") as file:
+            file.write(text)
+        os.replace(path + ".tmp", path)
+        self._index_bytes = len(text.encode())
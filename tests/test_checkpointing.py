@@ -0,0 +1,97 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.simulators import INVENTORY_DIR, SCRIPTS, load
+from checkpointing import Checkpointer, remove_checkpoint, write_atomically
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingCheckpointer(Checkpointer):
+    # Stops the run right after its first checkpoint, as a crash would
+    def saved(self, num_of_event):
+        super().saved(num_of_event)
+        raise Interrupted
+
+
+def run_script(name, cwd, *args):
+    subprocess.run([sys.executable, SCRIPTS[name], *args], cwd=cwd, check=True)
+
+
+def test_checkpointer_is_due_every_so_many_events(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path / "checkpoint.bin"), every_events=100)
+    assert checkpointer.check_interval == 100
+    assert not checkpointer.due(99)
+    assert checkpointer.due(100)
+    checkpointer.saved(100)
+    assert not checkpointer.due(150)
+    with pytest.raises(ValueError):
+        Checkpointer(str(tmp_path / "checkpoint.bin"))
+
+
+def test_write_atomically_and_remove(tmp_path):
+    path = str(tmp_path / "checkpoint.bin")
+    write_atomically(path, b"first")
+    write_atomically(path, b"second")
+    assert open(path, "rb").read() == b"second"
+    assert not os.path.exists(path + ".tmp")
+    remove_checkpoint(path)
+    remove_checkpoint(path)
+    assert not os.path.exists(path)
+
+
+def test_resumed_inventory_run_removes_its_checkpoint(tmp_path):
+    # Resuming without --checkpoint-events must still clean up, so that a
+    # second --resume cannot replay the old state
+    inventory = load("inventory_simulator")
+    sample = os.path.join(INVENTORY_DIR, "Sample IOs", "io1", "in.txt")
+    for run in ("resumed", "straight"):
+        (tmp_path / run).mkdir()
+        shutil.copy(sample, tmp_path / run / "in.txt")
+    resumed = tmp_path / "resumed"
+    system = inventory.SPIS(str(resumed / "in.txt"), str(resumed / "out.txt"))
+    system.reportInputParams()
+    checkpointer = InterruptingCheckpointer(str(resumed / "checkpoint.bin"), every_events=3000)
+    with pytest.raises(Interrupted):
+        for i, policy in enumerate(system.policies):
+            system.policy_index = i
+            system.simulation(policy, checkpointer)
+    system.output_file.close()
+
+    run_script("inventory_simulator", resumed, "--resume")
+    run_script("inventory_simulator", tmp_path / "straight")
+    assert not (resumed / "checkpoint.bin").exists()
+    assert (resumed / "out.txt").read_text() == (tmp_path / "straight" / "out.txt").read_text()
+
+
+def test_resumed_queue_run_removes_its_checkpoint(tmp_path):
+    queue = load("queue_simulator")
+    for run in ("resumed", "straight"):
+        (tmp_path / run / "input_file").mkdir(parents=True)
+        (tmp_path / run / "input_file" / "in.txt").write_text("1.0 0.9 5000")
+    run_script("queue_simulator", tmp_path / "straight")
+
+    # The straight run's header, then an interrupted run of the same queue
+    resumed = tmp_path / "resumed"
+    output_dir = str(resumed / "output_files") + os.sep
+    os.makedirs(output_dir)
+    header = (tmp_path / "straight" / "output_files" / "results.txt").read_text().split("\nAvg delay")[0]
+    (resumed / "output_files" / "results.txt").write_text(header)
+    system = queue.SingleServerQueue.from_input_file(str(resumed / "input_file" / "in.txt"),
+                                                     trace_sink=queue.open_trace_sink("text", output_dir))
+    checkpointer = InterruptingCheckpointer(output_dir + "checkpoint.bin", every_events=2000)
+    with pytest.raises(Interrupted):
+        system.run(checkpointer=checkpointer)
+    system.trace_sink.close()
+
+    run_script("queue_simulator", resumed, "--resume")
+    assert not (resumed / "output_files" / "checkpoint.bin").exists()
+    for name in ("results.txt", "event_orders.txt"):
+        assert ((resumed / "output_files" / name).read_text()
+                == (tmp_path / "straight" / "output_files" / name).read_text())
@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from benchmarks.simulators import DISTRIBUTION_DIR, load_distribution
+
+fitting = load_distribution("fitting")
+goodness_of_fit = load_distribution("goodness_of_fit")
+sample_cache = load_distribution("sample_cache")
+streaming = load_distribution("streaming")
+
+SAMPLE = os.path.join(DISTRIBUTION_DIR, "sample.txt")
+
+# The streaming code sums in chunks and merges partial moments, so its
+# results agree with the original whole-array NumPy/SciPy ones to rounding
+# only, not bit for bit. These are the tolerances they are held to.
+MOMENT_RTOL = 1e-12
+GAMMA_RTOL = 1e-9
+WEIBULL_RTOL = 1e-5
+CHI_SQUARE_RTOL = 1e-9
+# KS and Anderson-Darling come from binned F(x) values; see anderson_darling
+KS_ATOL = 1e-3
+AD_RTOL = 0.04
+
+
+@pytest.fixture(scope="module")
+def data():
+    # What the tasks originally computed from
+    return np.loadtxt(SAMPLE)
+
+
+@pytest.fixture(scope="module")
+def cached(tmp_path_factory):
+    # What they compute from now
+    return sample_cache.load_sample(SAMPLE, cache_dir=str(tmp_path_factory.mktemp("sample_cache")))
+
+
+def test_cached_sample_is_the_text(data, cached):
+    assert np.array_equal(cached, data)
+
+
+def test_task_a_statistics(data, cached):
+    moments, sketch, _ = streaming.summarize_chunks(streaming.array_chunks(cached))
+    assert moments.mean == pytest.approx(np.mean(data), rel=MOMENT_RTOL)
+    # The sketch is exact below SKETCH_CAPACITY observations
+    assert len(data) < streaming.SKETCH_CAPACITY
+    assert sketch.median() == np.median(data)
+    assert moments.std() == pytest.approx(np.std(data), rel=MOMENT_RTOL)
+    assert moments.skewness() == pytest.approx(stats.skew(data), rel=MOMENT_RTOL)
+
+
+def test_task_a_statistics_across_chunks(data):
+    # Merging partial moments gives the same answers as one chunk
+    moments, _, _ = streaming.summarize_chunks(streaming.array_chunks(data, chunk_size=97))
+    assert moments.mean == pytest.approx(np.mean(data), rel=MOMENT_RTOL)
+    assert moments.std() == pytest.approx(np.std(data), rel=MOMENT_RTOL)
+    assert moments.skewness() == pytest.approx(stats.skew(data), rel=MOMENT_RTOL)
+
+
+def test_task_b_gamma_fit(data, cached):
+    alpha, loc, scale = fitting.fit_gamma(cached)
+    expected_alpha, _, expected_scale = stats.gamma.fit(data, floc=0)
+    assert loc == 0
+    assert alpha == pytest.approx(expected_alpha, rel=GAMMA_RTOL)
+    assert scale == pytest.approx(expected_scale, rel=GAMMA_RTOL)
+
+
+def test_task_b_weibull_fit(data, cached):
+    c, loc, scale = fitting.fit_weibull(cached)
+    expected = stats.weibull_min.fit(data, floc=0)
+    assert loc == 0
+    assert c == pytest.approx(expected[0], rel=WEIBULL_RTOL)
+    assert scale == pytest.approx(expected[2], rel=WEIBULL_RTOL)
+    # Newton's solution is at least as likely as SciPy's
+    log_likelihood = stats.weibull_min.logpdf(data, c, scale=scale).sum()
+    assert log_likelihood >= stats.weibull_min.logpdf(data, *expected).sum() - 1e-9
+
+
+def test_task_c_chi_square(data, cached):
+    # The original per-bin loop against the vectorized CDF over the edges
+    alpha, _, scale = stats.gamma.fit(data, floc=0)
+    edges = np.linspace(min(data), max(data), 51)
+    observed, _ = np.histogram(data, bins=edges)
+    expected = np.array([stats.gamma.cdf(edges[i + 1], alpha, scale=scale) - stats.gamma.cdf(edges[i], alpha, scale=scale)
+                         for i in range(50)]) * len(data)
+    baseline = ((observed - expected) ** 2 / expected).sum()
+
+    alpha, _, scale = fitting.fit_gamma(cached)
+    expected = np.diff(stats.gamma.cdf(edges, alpha, scale=scale)) * len(cached)
+    assert ((observed - expected) ** 2 / expected).sum() == pytest.approx(baseline, rel=CHI_SQUARE_RTOL)
+
+
+def test_goodness_of_fit_against_exact_statistics(data, cached):
+    table = {row["distribution"].split("(")[0]: row for row in goodness_of_fit.goodness_of_fit(cached)}
+    statistics = fitting.SufficientStatistics().update(data)
+    for candidate in goodness_of_fit.fit_candidates(data, statistics):
+        row = table[candidate.name.split("(")[0]]
+        u = np.sort(candidate.distribution.cdf(data))
+        n = len(u)
+        assert row["ks"] == pytest.approx(stats.kstest(data, candidate.distribution.cdf).statistic, abs=KS_ATOL)
+        i = np.arange(1, n + 1)
+        exact_ad = -n - np.mean((2 * i - 1) * (np.log(u) + np.log1p(-u[::-1])))
+        assert row["ad"] == pytest.approx(exact_ad, rel=AD_RTOL)
+        # Equal-width chi-square from the shared histogram is exact
+        edges = np.linspace(data.min(), data.max(), goodness_of_fit.EQUAL_WIDTH_BINS + 1)
+        observed, _ = np.histogram(data, bins=edges)
+        expected = n * np.diff(candidate.distribution.cdf(edges))
+        statistic, _ = goodness_of_fit.chi_square(observed, expected, candidate.num_params)
+        assert row["chi2_equal_width"][0] == pytest.approx(statistic, rel=CHI_SQUARE_RTOL)
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from event_list import CalendarQueue, FutureEventList
+
+EVENT_LISTS = [FutureEventList, CalendarQueue]
+
+
+def drain(event_list):
+    events = []
+    while len(event_list):
+        events.append(event_list.pop())
+    return events
+
+
+@pytest.mark.parametrize("event_list_class", EVENT_LISTS)
+def test_events_come_out_by_time_rank_and_order(event_list_class):
+    generator = random.Random(7)
+    event_list = event_list_class(priority={2: 0})
+    expected = []
+    for sequence in range(500):
+        # Coarse times give plenty of ties
+        time, event_type = generator.randrange(50) / 4, generator.choice((1, 2, 3))
+        event_list.schedule(time, event_type, sequence)
+        expected.append((time, {2: 0}.get(event_type, event_type), sequence, event_type))
+    expected.sort()
+    assert drain(event_list) == [(time, event_type, sequence) for time, _, sequence, event_type in expected]
+    with pytest.raises(IndexError):
+        event_list.pop()
+
+
+@pytest.mark.parametrize("event_list_class", EVENT_LISTS)
+def test_cancelled_events_are_skipped(event_list_class):
+    event_list = event_list_class()
+    handles = [event_list.schedule(float(time), 1, time) for time in range(10)]
+    for handle in handles[::2]:
+        event_list.cancel(handle)
+    event_list.cancel(handles[0])
+    assert len(event_list) == 5
+    assert event_list.peek_time() == 1.0
+    assert [data for _, _, data in drain(event_list)] == [1, 3, 5, 7, 9]
+    assert event_list.peek_time() == float("inf")
+
+
+@pytest.mark.parametrize("restored_class", EVENT_LISTS)
+@pytest.mark.parametrize("event_list_class", EVENT_LISTS)
+def test_restore_continues_a_snapshot(event_list_class, restored_class):
+    event_list = event_list_class()
+    for time in (3.0, 1.0, 2.0, 1.0, 5.0):
+        event_list.schedule(time, 1, time)
+    event_list.pop()
+    snapshot, num_scheduled = event_list.snapshot(), event_list.num_scheduled
+
+    restored = restored_class()
+    handles = restored.restore(snapshot, num_scheduled)
+    # The handles are the restored entries, in snapshot order, and cancel them
+    assert [tuple(handle[:5]) for handle in handles] == snapshot
+    restored.cancel(next(handle for handle in handles if handle[4] == 3.0))
+    # Sequence numbers continue, so a new tie still goes after the old events
+    event_list.schedule(2.0, 1, "new")
+    restored.schedule(2.0, 1, "new")
+    assert [data for _, _, data in drain(restored)] == [1.0, 2.0, "new", 5.0]
+    assert [data for _, _, data in drain(event_list)] == [1.0, 2.0, "new", 3.0, 5.0]
@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.simulators import load
+
+inventory = load("inventory_simulator")
+
+# in.txt of the inventory model with short replications: 10 items to start
+# with, 2 months, demands every 0.2 months on average, no policies (they are
+# passed in)
+INPUT = """10 2 0
+5 0.2
+10.0 2.0 2.0 10.0
+1.0 5.5
+0.10 0.43 0.50 0.70 1.0
+"""
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "in.txt"
+    path.write_text(INPUT)
+    return str(path)
+
+
+def test_optimizer_over_a_large_grid(input_file):
+    # 1275 policies take 11 halving rounds, i.e. 2048 replications in the last
+    policies = inventory.policy_grid(0, 100, 2)
+    assert len(policies) > 1024
+    assert inventory.halving_replications(len(policies), 2, 2) == 2048
+    result = inventory.optimize_policies(input_file, policies, initial_reps=2, eta=2, workers=2)
+    assert result.policy in policies
+    assert result.num_of_replications == 2048
+    assert result.simulated_months < result.brute_force_months
+
+
+def test_optimizer_rejects_overlapping_substreams(input_file):
+    with pytest.raises(ValueError, match="overlap substreams"):
+        inventory.optimize_policies(input_file, [[10, 40], [20, 60]], initial_reps=2 ** 31, workers=1)
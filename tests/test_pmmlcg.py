@@ -0,0 +1,72 @@
+import pytest
+
+from pmmlcg import PMMLCG, SubstreamFactory
+
+
+def stepped(stream, k, generator=None):
+    # A generator moved k draws forward one generate() at a time
+    generator = PMMLCG() if generator is None else generator
+    for _ in range(k):
+        generator.generate(stream)
+    return generator
+
+
+@pytest.mark.parametrize("k", [0, 1, 2, 1000, 4097, 100000])
+@pytest.mark.parametrize("stream", [1, 2, 100])
+def test_jump_ahead_equals_sequential_draws(stream, k):
+    jumped = PMMLCG()
+    jumped.jump_ahead(stream, k)
+    naive = stepped(stream, k)
+    assert jumped.get_seed(stream) == naive.get_seed(stream)
+    assert [jumped.generate(stream) for _ in range(3)] == [naive.generate(stream) for _ in range(3)]
+
+
+def test_jump_ahead_leaves_other_streams_alone():
+    generator = PMMLCG()
+    generator.jump_ahead(1, 12345)
+    assert generator.zrng[2:] == PMMLCG().zrng[2:]
+
+
+def test_jump_ahead_from_buffered_stream():
+    # A buffered stream jumps from the last value handed out, not from the
+    # end of its block
+    buffered = PMMLCG(buffer_size=64)
+    for _ in range(10):
+        buffered.generate(1)
+    buffered.jump_ahead(1, 500)
+    assert buffered.get_seed(1) == stepped(1, 510).get_seed(1)
+    assert buffered.generate(1) == stepped(1, 510).generate(1)
+
+
+@pytest.mark.parametrize("index", [0, 1, 3, 7])
+def test_substream_starts_index_times_length_in(index):
+    factory = SubstreamFactory(1, length=1000)
+    assert factory.seed(index) == stepped(1, index * 1000).get_seed(1)
+
+
+def test_jump_ahead_across_substream_boundary():
+    # Running off the end of substream 2 continues exactly at substream 3, and
+    # a jump that starts in one substream and ends in the next agrees with
+    # stepping
+    factory = SubstreamFactory(1, length=1000)
+    generator = stepped(1, 1000, factory.substream(2))
+    assert generator.get_seed(1) == factory.seed(3)
+
+    jumped = stepped(1, 990, factory.substream(2))
+    jumped.jump_ahead(1, 25)
+    naive = stepped(1, 1015, factory.substream(2))
+    assert jumped.get_seed(1) == naive.get_seed(1)
+    assert jumped.get_seed(1) == stepped(1, 15, factory.substream(3)).get_seed(1)
+
+
+def test_generate_block_matches_generate():
+    block = PMMLCG().generate_block(5, 5000)
+    naive = PMMLCG()
+    assert block.tolist() == [naive.generate(5) for _ in range(5000)]
+
+
+def test_substream_index_out_of_range():
+    factory = SubstreamFactory(1, length=2 ** 30)
+    assert factory.max_substreams == 1
+    with pytest.raises(ValueError):
+        factory.seed(1)
@@ -0,0 +1,31 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.simulators import SCRIPTS
+
+
+@pytest.fixture
+def queue_dir(tmp_path):
+    (tmp_path / "input_file").mkdir()
+    (tmp_path / "input_file" / "in.txt").write_text("1.0 0.9 500")
+    return tmp_path
+
+
+@pytest.mark.parametrize("mode", [["--replications", "3"], ["--fast-fifo"], ["--steady-state", "1000"], ["--cache"]])
+def test_queue_profile_rejects_modes_that_skip_the_event_loop(queue_dir, mode):
+    run = subprocess.run([sys.executable, SCRIPTS["queue_simulator"], "--profile", "profile.json", *mode],
+                         cwd=queue_dir, capture_output=True, text=True)
+    assert run.returncode == 2
+    assert "--profile" in run.stderr
+    assert not (queue_dir / "profile.json").exists()
+
+
+def test_queue_profile_is_written(queue_dir):
+    subprocess.run([sys.executable, SCRIPTS["queue_simulator"], "--profile", "profile.json"],
+                   cwd=queue_dir, check=True)
+    profile = json.loads((queue_dir / "profile.json").read_text())
+    assert profile["model"] == "SingleServerQueue"
+    assert profile["events"] > 0
@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.simulators import load
+
+queue = load("queue_simulator")
+
+
+def test_target_half_width_runs_at_least_n_reps():
+    # More initial replications than MAX_REPLICATIONS still get a substream each
+    assert 150 > queue.MAX_REPLICATIONS
+    summary = queue.replicate((1.0, 0.5, 100), 150, workers=2, target_relative_half_width=0.5)
+    assert summary.num_replications == 150
+
+
+def test_replicate_rejects_overlapping_substreams():
+    with pytest.raises(ValueError, match="overlap substreams"):
+        queue.replicate((1.0, 0.5, 100), 2 ** 30, workers=1)
@@ -0,0 +1,92 @@
+import argparse
+import os
+
+import numpy as np
+
+import event_list
+import pmmlcg
+import result_cache
+import variates
+from benchmarks.simulators import INVENTORY_DIR, load
+
+inventory = load("inventory_simulator")
+
+
+def disk_bytes(cache_dir):
+    return sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+
+
+def runs(first, count):
+    return [(result_cache.result_key("model", {"x": x}, 1, "v"), {"x": x}, 1, {"y": np.arange(4.0) * x})
+            for x in range(first, first + count)]
+
+
+def test_put_many_and_get(tmp_path):
+    with result_cache.ResultCache(str(tmp_path)) as cache:
+        cache.put_many("model", "v", runs(0, 10))
+    cache = result_cache.ResultCache(str(tmp_path))
+    key, _, _, columns = runs(7, 1)[0]
+    assert cache.get(key)["y"].tolist() == columns["y"].tolist()
+    assert cache.get(result_cache.result_key("model", {"x": 99}, 1, "v")) is None
+    assert cache.query("model")["x"].tolist() == list(range(10))
+
+
+def test_size_counts_the_index(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+    for first in range(0, 50, 10):
+        cache.put_many("model", "v", runs(first, 10))
+    cache.flush()
+    assert cache.size() == disk_bytes(str(tmp_path))
+    # A fresh cache reads the index size back
+    assert result_cache.ResultCache(str(tmp_path)).size() == disk_bytes(str(tmp_path))
+
+
+def test_eviction_keeps_segments_and_index_within_budget(tmp_path):
+    with result_cache.ResultCache(str(tmp_path)) as cache:
+        for first in range(0, 50, 10):
+            cache.put_many("model", "v", runs(first, 10))
+    budget = disk_bytes(str(tmp_path)) // 2
+    with result_cache.ResultCache(str(tmp_path), max_bytes=budget) as cache:
+        cache.put_many("model", "v", runs(50, 10))
+    assert disk_bytes(str(tmp_path)) <= budget
+    # The newest runs survive
+    cache = result_cache.ResultCache(str(tmp_path))
+    assert cache.get(runs(55, 1)[0][0]) is not None
+
+
+def test_cache_arguments(tmp_path):
+    parser = argparse.ArgumentParser()
+    result_cache.add_cache_arguments(parser, "reuse runs")
+    args = parser.parse_args(["--cache", "--cache-dir", str(tmp_path), "--cache-size", "3"])
+    cache = result_cache.ResultCache.from_args(args)
+    assert args.cache
+    assert (cache.cache_dir, cache.max_bytes) == (str(tmp_path), 3 << 20)
+    args = parser.parse_args([])
+    assert (args.cache, args.cache_dir, args.cache_size) == (False, result_cache.CACHE_DIR, result_cache.MAX_BYTES >> 20)
+
+
+def test_sequential_inventory_run_stores_one_segment(tmp_path):
+    input_file = os.path.join(INVENTORY_DIR, "in.txt")
+    cache = result_cache.ResultCache(str(tmp_path / "cache"))
+    system = inventory.SPIS(input_file, None, cache=cache)
+    costs = [system.simulation(policy) for policy in system.policies]
+    system.store_results()
+    cache.flush()
+    assert len(cache.index["segments"]) == 1
+    assert len(cache.index["entries"]) == len(system.policies)
+
+    # A second run is served from the cache, leaving the generator where
+    # the simulations would have
+    cache = result_cache.ResultCache(str(tmp_path / "cache"))
+    cached_system = inventory.SPIS(input_file, None, cache=cache)
+    assert [cached_system.simulation(policy) for policy in cached_system.policies] == costs
+    assert cached_system.pending_results == []
+    assert cached_system.prime_mod_generator.get_seed(1) == system.prime_mod_generator.get_seed(1)
+
+
+def test_inventory_cache_key_covers_shared_modules():
+    # Editing the generator or the event list must retire cached runs
+    system = inventory.SPIS(os.path.join(INVENTORY_DIR, "in.txt"), None)
+    version = system.cache_entry(system.policies[0])[1][3]
+    assert version == result_cache.code_version(inventory.__file__, variates.__file__, pmmlcg.__file__,
+                                                event_list.__file__)
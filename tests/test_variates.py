@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import pytest
+
+import variates
+from pmmlcg import PMMLCG
+
+
+def scalar_exponential(u, mean, decimals):
+    # SingleServerQueue.exponen() for a given uniform and rounding
+    return -1 * mean * math.log(round(u, decimals) or 10 ** -decimals)
+
+
+def near_halves(decimals, size=20000):
+    # Uniforms at and one ulp either side of (m + 0.5) / 10^decimals, where
+    # scaling and rounding are easiest to get wrong
+    generator = np.random.default_rng(decimals)
+    halves = (generator.integers(0, 10 ** decimals, size) + 0.5) / 10 ** decimals
+    return np.concatenate([halves, np.nextafter(halves, 0), np.nextafter(halves, 1)])
+
+
+@pytest.mark.parametrize("decimals", [1, 3, 6, 8])
+def test_rounded_exponential_matches_scalar_code(decimals):
+    u = np.concatenate([near_halves(decimals), np.random.default_rng(1).random(20000),
+                        PMMLCG().generate_block(1, 20000), [0.0, 10 ** -decimals / 3, 1.0]])
+    expected = [scalar_exponential(x, 2.5, decimals) for x in u.tolist()]
+    assert variates.exponential(u, 2.5, decimals=decimals).tolist() == expected
+
+
+def test_unrounded_exponential_matches_scalar_code():
+    u = PMMLCG().generate_block(1, 20000)
+    assert variates.exponential(u, 0.2).tolist() == [-1 * 0.2 * math.log(x) for x in u.tolist()]
+
+
+@pytest.mark.parametrize("method", ["inversion", "alias"])
+def test_discrete_sample_matches_draw(method):
+    distribution = variates.DiscreteDistribution(range(1, 5), cumulative=[0.1, 0.43, 0.5, 1.0], method=method)
+    u = PMMLCG().generate_block(1, 5000)
+    assert distribution.sample(u).tolist() == [distribution.draw(x) for x in u.tolist()]
+
+
+def test_inversion_matches_linear_walk():
+    cumulative = [0.1, 0.43, 0.5, 0.7, 1.0]
+    distribution = variates.DiscreteDistribution(range(1, 6), cumulative=cumulative)
+    for x in PMMLCG().generate_block(1, 5000).tolist():
+        walked = next(size for size, probability in enumerate(cumulative, 1) if x < probability)
+        assert distribution.draw(x) == walked
@@ -0,0 +1,160 @@
+import bisect
+import math
+import numpy as np
+
+# Random variates shared by the simulators. Every generator turns an array of
+# uniforms, e.g. a PMMLCG.generate_block() or a numpy Generator.random(), into
+# an array of variates, so a whole block is transformed with a few NumPy
+# operations. With compatible=True (the default) a variate is bit-identical to
+# the one the simulators' scalar code computes from the same uniform.
+
+# Largest rounding of the uniforms for which exponential() looks logarithms up
+# in a table instead of calling math.log on every uniform
+MAX_TABLE_DECIMALS = 6
+
+# Distance from a half, in units of 10^-decimals, within which a scaled
+# uniform is rounded by round() rather than np.rint; far above the rounding
+# error of the scaling, which is below 10^-9
+HALF_TOLERANCE = 1e-6
+
+_log_tables = {}
+
+
+def _log_table(decimals):
+    # math.log(round(u, decimals) or 10^-decimals) for every value round() can give
+    table = _log_tables.get(decimals)
+    if table is None:
+        scale = 10 ** decimals
+        table = np.array([math.log(m / scale or 1 / scale) for m in range(scale + 1)])
+        _log_tables[decimals] = table
+    return table
+
+
+def _rounded_indices(u, decimals):
+    # round(x, decimals) * 10^decimals for every uniform x, as integers.
+    # round() rounds the exact value of x, while u * 10^decimals is itself
+    # rounded before np.rint sees it, so within a few ulps of a half the two
+    # can disagree; those few uniforms go through round() itself.
+    scaled = u * 10 ** decimals
+    indices = np.rint(scaled).astype(np.intp)
+    near_half = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < HALF_TOLERANCE)
+    for i in near_half.tolist():
+        indices.flat[i] = round(round(float(u.flat[i]), decimals) * 10 ** decimals)
+    return indices
+
+
+def uniform(u, a, b):
+    # U(a, b) variates, computed as SPIS.uniform() does
+    return a + np.asarray(u) * (b - a)
+
+
+def triangular(u, a, m, b):
+    # Triangular (a, m, b) variates by inversion, the formula of the project
+    # workbooks. The parameters broadcast, e.g. one (a, m, b) per column.
+    u = np.asarray(u)
+    width = np.asarray(b, dtype=float) - a
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mode_fraction = np.where(width > 0, (np.subtract(m, a)) / width, 0.0)
+    left = a + np.sqrt(width * np.subtract(m, a) * u)
+    right = b - np.sqrt(width * np.subtract(b, m) * (1 - u))
+    return np.where(u < mode_fraction, left, right)
+
+
+def exponential(u, mean, decimals=None, compatible=True):
+    # Exponential variates by inversion, -mean * log(u). With `decimals` the
+    # uniforms are first rounded, a zero becoming 10^-decimals, as
+    # SingleServerQueue.exponen() does with 6. np.log can differ from math.log
+    # in the last bit, so compatible variates take math.log of every uniform:
+    # looked up from a table when rounding leaves at most 10^6 + 1 values,
+    # elementwise otherwise.
+    u = np.asarray(u, dtype=float)
+    if compatible:
+        if decimals is None:
+            logs = [math.log(x) for x in u.ravel().tolist()]
+        elif decimals <= MAX_TABLE_DECIMALS:
+            return -1 * mean * _log_table(decimals)[_rounded_indices(u, decimals)]
+        else:
+            logs = [math.log(round(x, decimals) or 10 ** -decimals) for x in u.ravel().tolist()]
+        return -1 * mean * np.array(logs).reshape(u.shape)
+    if decimals is not None:
+        u = np.maximum(np.round(u, decimals), 10.0 ** -decimals)
+    return -1 * mean * np.log(u)
+
+
+def exponential_ziggurat(rng, mean, size):
+    # Exponential variates from numpy's ziggurat sampler. It consumes a
+    # variable number of the generator's raw bits per variate, so it needs a
+    # numpy Generator rather than a block of uniforms, and its draws do not
+    # match any inversion.
+    return mean * rng.standard_exponential(size, method="zig")
+
+
+class DiscreteDistribution:
+    # A distribution over `values` given by `probabilities` or `cumulative`
+    # probabilities. "inversion" returns the first value whose cumulative
+    # probability exceeds u. This is what a linear walk over the cumulative
+    # probabilities and np.random.choice() return, so it reproduces their
+    # draws. It costs O(log n) per variate. "alias" uses a Walker/Vose alias
+    # table, built once, for O(1) per variate. It splits one uniform into a
+    # column and a coin flip, so its draws differ from inversion's.
+    def __init__(self, values, probabilities=None, cumulative=None, method="inversion"):
+        if (probabilities is None) == (cumulative is None):
+            raise ValueError("Give either probabilities or cumulative probabilities")
+        if method not in ("inversion", "alias"):
+            raise ValueError(f"Unknown sampling method: {method}")
+        self.values = np.asarray(values)
+        self.method = method
+        if cumulative is None:
+            # Normalized as np.random.choice() does
+            cumulative = np.cumsum(np.asarray(probabilities, dtype=float))
+            cumulative /= cumulative[-1]
+        self.cumulative = np.asarray(cumulative, dtype=float)
+        self._cumulative_list = self.cumulative.tolist()
+        self._values_list = self.values.tolist()
+        if len(self.cumulative) != len(self.values):
+            raise ValueError("Need one probability per value")
+        if method == "alias":
+            self.cutoffs, self.aliases = self._alias_table(np.diff(self.cumulative, prepend=0.0))
+            self._alias_lists = (self.cutoffs.tolist(), self.aliases.tolist())
+
+    @staticmethod
+    def _alias_table(probabilities):
+        # Vose's method: each of the n columns keeps its own value with
+        # probability cutoffs[i] and otherwise gives aliases[i]
+        n = len(probabilities)
+        scaled = probabilities * (n / probabilities.sum())
+        cutoffs = np.ones(n)
+        aliases = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            cutoffs[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left has probability 1 up to round-off
+        return cutoffs, aliases
+
+    def sample(self, u):
+        # One variate per uniform
+        u = np.asarray(u)
+        if self.method == "alias":
+            scaled = u * len(self.values)
+            columns = np.minimum(scaled.astype(np.intp), len(self.values) - 1)
+            columns = np.where(scaled - columns < self.cutoffs[columns], columns, self.aliases[columns])
+            return self.values[columns]
+        indices = np.searchsorted(self.cumulative, u, side="right")
+        return self.values[np.minimum(indices, len(self.values) - 1)]
+
+    def draw(self, u):
+        # One variate from one uniform, without NumPy's per-call overhead
+        if self.method == "alias":
+            cutoffs, aliases = self._alias_lists
+            scaled = u * len(self._values_list)
+            column = min(int(scaled), len(self._values_list) - 1)
+            if scaled - column >= cutoffs[column]:
+                column = aliases[column]
+            return self._values_list[column]
+        index = bisect.bisect_right(self._cumulative_list, u)
+        return self._values_list[min(index, len(self._values_list) - 1)]